@@ -48,7 +48,7 @@ def play(values, result, history):
 
         if len(assignments) == 0:
             break
-        box, value = assignments.pop()
+        box, value = assignments.pop(0)
         values[box] = value
 
     # leave game showing until closed by user
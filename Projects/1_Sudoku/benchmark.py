@@ -0,0 +1,198 @@
+"""Benchmark solve() on the bundled puzzle corpora and compare runs against a baseline.
+
+The corpora in benchmarks/ hold diagonal puzzles, one grid per line:
+
+    easy           solved by constraint propagation alone
+    hard           need a few dozen search nodes
+    pathological   the puzzles needing the most search nodes among 600 generated ones
+
+For every puzzle the best wall time over a few repeats is recorded, with the
+number of search nodes expanded, backtracks and propagation runs (from
+bitboard.counters, so they stay 0 for the dlx backend) and the peak memory
+allocated while solving (measured in a separate run under tracemalloc).
+
+    python benchmark.py --save baseline.json      # record a baseline
+    python benchmark.py --compare baseline.json   # exit with status 1 on regressions
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tracemalloc
+from timeit import default_timer as timer
+
+import bitboard
+import solution
+
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks')
+
+CORPORA = ('easy', 'hard', 'pathological')
+
+METRICS = ('seconds', 'nodes', 'backtracks', 'passes', 'peak_bytes')
+
+# relative increase of each corpus total tolerated by compare(); the counters
+# are deterministic, the wall time is not
+TOLERANCES = {'seconds': 0.25, 'nodes': 0.0, 'backtracks': 0.0, 'passes': 0.0, 'peak_bytes': 0.1}
+
+
+def load_corpus(name):
+    """Return the grids of a bundled corpus """
+    with open(os.path.join(CORPUS_DIR, name + '.txt')) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def measure(grid, backend='propagation', repeat=3):
+    """Solve one puzzle and return its metrics
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid
+
+    backend(string)
+        the solver engine passed to solution.solve()
+
+    repeat(int)
+        the number of timed runs; the fastest one is kept
+
+    Returns
+    -------
+    dict
+        whether the puzzle was 'solved', and its wall time in 'seconds', search
+        'nodes', 'backtracks', propagation 'passes' and 'peak_bytes' of memory
+    """
+    seconds = None
+    for _ in range(repeat):
+        bitboard.reset_counters()
+        start = timer()
+        solved = solution.solve(grid, backend)
+        elapsed = timer() - start
+        if seconds is None or elapsed < seconds:
+            seconds = elapsed
+    counters = dict(bitboard.counters)
+
+    tracemalloc.start()
+    try:
+        solution.solve(grid, backend)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'solved': bool(solved), 'seconds': seconds, 'nodes': counters['nodes'],
+            'backtracks': counters['backtracks'], 'passes': counters['passes'], 'peak_bytes': peak}
+
+
+def totals(puzzles):
+    """Sum the metrics of a corpus (the peak memory is the largest one) """
+    return {
+        'puzzles': len(puzzles),
+        'solved': sum(p['solved'] for p in puzzles),
+        'seconds': sum(p['seconds'] for p in puzzles),
+        'nodes': sum(p['nodes'] for p in puzzles),
+        'backtracks': sum(p['backtracks'] for p in puzzles),
+        'passes': sum(p['passes'] for p in puzzles),
+        'peak_bytes': max((p['peak_bytes'] for p in puzzles), default=0),
+    }
+
+
+def run(corpora=CORPORA, backend='propagation', repeat=3):
+    """Benchmark every puzzle of the given corpora
+
+    Returns
+    -------
+    dict
+        the results, as saved in a baseline: the 'backend', the 'python'
+        version, and for each corpus its per-puzzle metrics and their totals
+    """
+    results = {'backend': backend, 'python': platform.python_version(), 'corpora': {}}
+    for name in corpora:
+        puzzles = [measure(grid, backend, repeat) for grid in load_corpus(name)]
+        results['corpora'][name] = {'puzzles': puzzles, 'totals': totals(puzzles)}
+    return results
+
+
+def compare(results, baseline, tolerances=TOLERANCES):
+    """List the regressions of a run against a baseline
+
+    Only the corpora present in both are compared, on the totals of each
+    metric and on the number of puzzles solved.
+
+    Parameters
+    ----------
+    results, baseline(dict)
+        the outputs of run()
+
+    tolerances(dict)
+        the relative increase allowed for each metric
+
+    Returns
+    -------
+    list
+        a message for each regression (empty if there is none)
+    """
+    regressions = []
+    for name, corpus in sorted(results['corpora'].items()):
+        if name not in baseline['corpora']:
+            continue
+        now, before = corpus['totals'], baseline['corpora'][name]['totals']
+        if now['solved'] < before['solved']:
+            regressions.append('{}: {} puzzles solved, down from {}'.format(name, now['solved'],
+                                                                          before['solved']))
+        for metric in METRICS:
+            if metric not in before:
+                continue
+            limit = before[metric] * (1 + tolerances.get(metric, 0))
+            if now[metric] > limit:
+                regressions.append('{}: {} went from {:.6g} to {:.6g}'.format(name, metric, before[metric],
+                                                                           now[metric]))
+    return regressions
+
+
+def report(results):
+    """Return the totals of a run as a table, one line per corpus """
+    lines = ['{:<14}{:>9}{:>12}{:>10}{:>12}{:>10}{:>12}'.format('corpus', 'solved', 'seconds', 'nodes',
+                                                               'backtracks', 'passes', 'peak_bytes')]
+    for name, corpus in results['corpora'].items():
+        t = corpus['totals']
+        lines.append('{:<14}{:>9}{:>12.4f}{:>10}{:>12}{:>10}{:>12}'.format(
+            name, '{}/{}'.format(t['solved'], t['puzzles']), t['seconds'], t['nodes'], t['backtracks'],
+            t['passes'], t['peak_bytes']))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Sudoku solver on the bundled corpora.')
+    parser.add_argument('corpora', nargs='*', default=list(CORPORA), metavar='CORPUS',
+                        help='corpora to run ({})'.format(', '.join(CORPORA)))
+    parser.add_argument('--backend', choices=sorted(solution.backends), default='propagation',
+                        help='solver engine')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per puzzle (the fastest is kept)')
+    parser.add_argument('--save', metavar='PATH', help='write the results to a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='fail if the results regress against a baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCES['seconds'],
+                        help='relative slowdown allowed by --compare')
+    args = parser.parse_args(argv)
+    unknown = set(args.corpora) - set(CORPORA)
+    if unknown:
+        parser.error('unknown corpora: {}'.format(', '.join(sorted(unknown))))
+
+    results = run(args.corpora, args.backend, args.repeat)
+    print(report(results))
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        tolerances = dict(TOLERANCES, seconds=args.tolerance)
+        regressions = compare(results, baseline, tolerances)
+        for message in regressions:
+            print('REGRESSION ' + message, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,672 @@
+"""Bitmask board representation for the Sudoku solver.
+
+A board is a flat list of integers, one per box in row-major order (81 of them
+on a 9x9 board). Bit k of an entry is set when the k-th digit is still a
+candidate for that box, so a solved box holds a single bit and an empty mask
+means the board is contradictory.
+
+Unit and peer relations are precomputed once as tuples of box indices, so the
+strategies below only touch integers and never build strings or sets. Nothing
+below depends on the board size: 9x9, 16x16 and 25x25 boards only differ in
+their tables (see get_tables()).
+"""
+import random
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
+
+from utils import extract_units, extract_peers, make_layout
+
+
+Tables = namedtuple('Tables', ['boxes', 'index', 'digits', 'full', 'count', 'units', 'box_units',
+                               'peers', 'common_peers'])
+
+SYMBOLS = '123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# search nodes expanded, failed branches and propagation runs, for benchmarking
+# (see reset_counters())
+counters = {'nodes': 0, 'backtracks': 0, 'passes': 0}
+
+
+def _count_bits(mask):
+    return bin(mask).count('1')
+
+
+def make_tables(boxes, unitlist, digits='123456789'):
+    """Precompute the index tables used by every bitmask strategy
+
+    Parameters
+    ----------
+    boxes(list)
+        a list of strings identifying each box on a sudoku board (e.g., "A1", "C7", etc.)
+
+    unitlist(list)
+        a list containing "units" (rows, columns, diagonals, etc.) of boxes
+
+    digits(string)
+        the symbols that may be placed in a box; bit k of a mask stands for digits[k]
+
+    Returns
+    -------
+    Tables
+        a namedtuple holding the box order, the box -> index map, the digit
+        symbols, the mask with every digit set, a function counting the bits of
+        a mask, each unit as a tuple of indices, the ids of the units each box
+        belongs to, the peers of each box as a sorted tuple, and a read-only
+        mapping from every pair (a, b) of peers with a < b to the sorted tuple
+        of boxes that are peers of both
+    """
+    units = extract_units(unitlist, boxes)
+    peers = extract_peers(units, boxes)
+    index = {box: i for i, box in enumerate(boxes)}
+    peer_sets = [frozenset(index[p] for p in peers[box]) for box in boxes]
+    common_peers = {(a, b): tuple(sorted(peer_sets[a] & peer_sets[b]))
+                    for a in range(len(boxes)) for b in peer_sets[a] if a < b}
+    full = (1 << len(digits)) - 1
+    if len(digits) <= 16:
+        # a lookup table is much faster than counting, but only fits small masks
+        count = [_count_bits(mask) for mask in range(full + 1)].__getitem__
+    else:
+        count = _count_bits
+    return Tables(boxes=tuple(boxes),
+                  index=index,
+                  digits=digits,
+                  full=full,
+                  count=count,
+                  units=tuple(tuple(index[box] for box in unit) for unit in unitlist),
+                  box_units=tuple(tuple(u for u, unit in enumerate(unitlist) if box in unit)
+                                  for box in boxes),
+                  peers=tuple(tuple(sorted(ps)) for ps in peer_sets),
+                  common_peers=MappingProxyType(common_peers))
+
+
+@lru_cache(maxsize=None)
+def get_tables(size=9, diagonal=True):
+    """Return the (cached) tables of a size x size sudoku board
+
+    Parameters
+    ----------
+    size(int)
+        the number of boxes per row; must be a perfect square (9, 16, 25, ...)
+
+    diagonal(bool)
+        whether the two main diagonals are units
+
+    Returns
+    -------
+    Tables
+        the index tables from make_tables(), using the first size characters
+        of '123456789ABC...' as digits
+    """
+    if size > len(SYMBOLS):
+        raise ValueError('Boards larger than {0}x{0} are not supported'.format(len(SYMBOLS)))
+    boxes, unitlist = make_layout(size, diagonal)
+    return make_tables(boxes, unitlist, SYMBOLS[:size])
+
+
+def reset_counters():
+    """Zero the search and propagation counters """
+    for name in counters:
+        counters[name] = 0
+
+
+def mask2str(mask, tables):
+    """Return the candidate digits of a mask as a string, e.g. 0b101 -> '13' """
+    return ''.join(d for k, d in enumerate(tables.digits) if mask >> k & 1)
+
+
+def str2mask(value, tables):
+    """Return the mask of a string of candidate digits, e.g. '13' -> 0b101 """
+    mask = 0
+    for d in value:
+        mask |= 1 << tables.digits.index(d)
+    return mask
+
+
+def values2board(values, tables):
+    """Convert the dictionary representation {'A1': '123456789', ...} to a board """
+    return [str2mask(values[box], tables) for box in tables.boxes]
+
+
+def board2values(board, tables):
+    """Convert a board to the dictionary representation {'A1': '123456789', ...} """
+    return {box: mask2str(mask, tables) for box, mask in zip(tables.boxes, board)}
+
+
+def grid2board(grid, tables):
+    """Convert a grid string ('.' for empty boxes) to a board """
+    return [tables.full if val == '.' else 1 << tables.digits.index(val) for val in grid]
+
+
+def board2grid(board, tables):
+    """Convert a board to a grid string, with '.' for boxes that are not solved """
+    return ''.join(mask2str(mask, tables) if mask and not mask & (mask - 1) else '.' for mask in board)
+
+
+def is_solved(board):
+    """Return True if every box on the board holds exactly one candidate """
+    return all(mask and not mask & (mask - 1) for mask in board)
+
+
+def naked_twins(board, tables):
+    """Eliminate values using the naked twins strategy.
+
+    All twin pairs are collected from the input board before anything is
+    eliminated, so twins erased by an earlier pair are still processed.
+
+    Parameters
+    ----------
+    board(list)
+        a list of candidate masks
+
+    tables(Tables)
+        the index tables from make_tables()
+
+    Returns
+    -------
+    list
+        The board with the naked twins eliminated from peers
+    """
+    count, common_peers = tables.count, tables.common_peers
+    # look for twins within each unit; a pair sharing several units is kept once
+    twins = {}
+    for unit in tables.units:
+        seen = {}
+        for b in unit:
+            mask = board[b]
+            if count(mask) == 2:
+                for a in seen.setdefault(mask, []):
+                    twins[(a, b) if a < b else (b, a)] = mask
+                seen[mask].append(b)
+    # the boxes sharing a unit with both twins are precomputed
+    for (a, b), mask in twins.items():
+        clear = ~mask
+        for box in common_peers[a, b]:
+            board[box] &= clear
+    return board
+
+
+def eliminate(board, tables):
+    """Remove the digit of every solved box from the candidates of its peers
+
+    Parameters
+    ----------
+    board(list)
+        a list of candidate masks
+
+    tables(Tables)
+        the index tables from make_tables()
+
+    Returns
+    -------
+    list
+        The board with the assigned values eliminated from peers
+    """
+    peers = tables.peers
+    for box, mask in enumerate(board):
+        if mask and not mask & (mask - 1):
+            clear = ~mask
+            for peer in peers[box]:
+                board[peer] &= clear
+    return board
+
+
+def only_choice(board, tables):
+    """Assign every digit that fits in only one box of a unit to that box
+
+    Parameters
+    ----------
+    board(list)
+        a list of candidate masks
+
+    tables(Tables)
+        the index tables from make_tables()
+
+    Returns
+    -------
+    list
+        The board with all single-place digits assigned
+    """
+    for unit in tables.units:
+        # digits seen at least once and at least twice across the unit
+        once = twice = 0
+        for box in unit:
+            mask = board[box]
+            twice |= once & mask
+            once |= mask
+        unique = once & ~twice
+        if not unique:
+            continue
+        for box in unit:
+            hit = board[box] & unique
+            if hit:
+                board[box] = hit
+    return board
+
+
+def reduce_puzzle(board, tables, changed=None, incremental=True):
+    """Repeatedly apply all constraint strategies until no box gets solved
+
+    Parameters
+    ----------
+    board(list)
+        a list of candidate masks
+
+    tables(Tables)
+        the index tables from make_tables()
+
+    changed(iterable)
+        indices of the boxes changed since the board was last reduced (only
+        used by the incremental mode)
+
+    incremental(bool)
+        propagate from a worklist of changed boxes (see propagate()) instead of
+        rescanning the whole board with every strategy on each pass
+
+    Returns
+    -------
+    list or False
+        The reduced board, or False if some box ran out of candidates
+    """
+    if incremental:
+        return propagate(board, tables, changed)
+
+    count = tables.count
+    stalled = False
+    while not stalled:
+        solved_before = sum(count(mask) == 1 for mask in board)
+        eliminate(board, tables)
+        only_choice(board, tables)
+        naked_twins(board, tables)
+        if 0 in board:
+            return False
+        stalled = solved_before == sum(count(mask) == 1 for mask in board)
+    return board
+
+
+def propagate(board, tables, changed=None, trail=None):
+    """Apply eliminate, only choice and naked twins incrementally from a worklist
+
+    Instead of rescanning the whole board on every pass, only the boxes whose
+    candidates changed are re-checked against their peers, and only the units
+    containing a changed box are re-checked for single-place digits. The board
+    is abandoned as soon as a box or a digit in some unit runs out of places.
+
+    Parameters
+    ----------
+    board(list)
+        a list of candidate masks
+
+    tables(Tables)
+        the index tables from make_tables()
+
+    changed(iterable)
+        indices of the boxes changed since the board was last propagated;
+        every box is checked when omitted
+
+    trail(list)
+        if given, a (box, old_mask) entry is appended for every box that is
+        narrowed, so the changes can be rolled back with undo()
+
+    Returns
+    -------
+    list or False
+        The board at the propagation fixpoint, or False on a contradiction
+        (the board is then left partially narrowed)
+    """
+    counters['passes'] += 1
+    peers, common_peers, units, box_units = tables.peers, tables.common_peers, tables.units, tables.box_units
+    full, count_bits = tables.full, tables.count
+    boxes = list(range(len(board)) if changed is None else changed)
+    queued = [False] * len(board)
+    for box in boxes:
+        queued[box] = True
+    dirty = []
+    dirty_units = [False] * len(units)
+
+    def narrow(box, clear):
+        # remove the bits of clear from a box and queue it; False if it empties
+        mask = board[box] & ~clear
+        if mask == board[box]:
+            return True
+        if not mask:
+            return False
+        if trail is not None:
+            trail.append((box, board[box]))
+        board[box] = mask
+        if not queued[box]:
+            queued[box] = True
+            boxes.append(box)
+        return True
+
+    while boxes or dirty:
+        while boxes:
+            box = boxes.pop()
+            queued[box] = False
+            mask = board[box]
+            if not mask:
+                return False
+            count = count_bits(mask)
+            if count == 1:
+                for peer in peers[box]:
+                    if board[peer] & mask and not narrow(peer, mask):
+                        return False
+            elif count == 2:
+                for peer in peers[box]:
+                    if board[peer] == mask:
+                        for other in common_peers[(box, peer) if box < peer else (peer, box)]:
+                            if board[other] & mask and not narrow(other, mask):
+                                return False
+            for u in box_units[box]:
+                if not dirty_units[u]:
+                    dirty_units[u] = True
+                    dirty.append(u)
+
+        if dirty:
+            u = dirty.pop()
+            dirty_units[u] = False
+            unit = units[u]
+            once = twice = 0
+            for box in unit:
+                mask = board[box]
+                twice |= once & mask
+                once |= mask
+            if once != full:
+                return False
+            unique = once & ~twice
+            for box in unit:
+                hit = board[box] & unique
+                if hit:
+                    # two digits that can only go in the same box
+                    if hit & (hit - 1):
+                        return False
+                    if not narrow(box, ~hit):
+                        return False
+    return board
+
+
+def search(board, tables, changed=None, incremental=True, reduce=None):
+    """Solve a board with depth first search and constraint propagation
+
+    The box with the fewest remaining candidates is branched on first (ties
+    broken by box order), trying its digits in increasing order. Each child is
+    only propagated from the box that was branched on.
+
+    Parameters
+    ----------
+    board(list)
+        a list of candidate masks
+
+    tables(Tables)
+        the index tables from make_tables()
+
+    changed(iterable)
+        indices of the boxes changed since the board was last propagated;
+        every box is checked when omitted
+
+    incremental(bool)
+        reduce with the worklist propagation rather than full passes
+
+    reduce(callable)
+        if given, used instead of reduce_puzzle() to reduce every node; it
+        takes a board and the tables and returns the board or False (see
+        strategies.Pipeline.reduce)
+
+    Returns
+    -------
+    list or False
+        The solved board or False if no solution exists
+    """
+    counters['nodes'] += 1
+    if reduce is not None:
+        board = reduce(board, tables)
+    else:
+        board = reduce_puzzle(board, tables, changed, incremental)
+    if board is False:
+        return False
+
+    count = tables.count
+    unsolved = [(count(mask), box) for box, mask in enumerate(board) if count(mask) > 1]
+    if not unsolved:
+        return board
+
+    _, box = min(unsolved)
+    mask = board[box]
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        child = board[:]
+        child[box] = bit
+        result = search(child, tables, [box], incremental, reduce)
+        if result:
+            return result
+    return False
+
+
+def undo(board, trail, mark):
+    """Roll the board back to the state it had when the trail had length mark """
+    while len(trail) > mark:
+        box, mask = trail.pop()
+        board[box] = mask
+    return board
+
+
+def search_inplace(board, tables, trail=None):
+    """Solve a board in place with depth first search and constraint propagation
+
+    Unlike search(), no board is copied per node: every narrowed domain is
+    recorded on the trail and rolled back when a branch fails, so the memory
+    used grows with the search depth rather than with the number of nodes.
+    Branching order is the same as in search().
+
+    Parameters
+    ----------
+    board(list)
+        a list of candidate masks; it is modified in place
+
+    tables(Tables)
+        the index tables from make_tables()
+
+    trail(list)
+        the undo trail shared by the recursion (a new one is started if omitted)
+
+    Returns
+    -------
+    list or False
+        The solved board or False if no solution exists
+    """
+    counters['nodes'] += 1
+    if trail is None:
+        if propagate(board, tables) is False:
+            return False
+        trail = []
+
+    count_bits = tables.count
+    best = None
+    for box, mask in enumerate(board):
+        count = count_bits(mask)
+        if count > 1 and (best is None or count < best[0]):
+            best = (count, box)
+    if best is None:
+        return board
+
+    box = best[1]
+    mask = board[box]
+    mark = len(trail)
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        trail.append((box, board[box]))
+        board[box] = bit
+        if propagate(board, tables, [box], trail) and search_inplace(board, tables, trail):
+            return board
+        counters['backtracks'] += 1
+        undo(board, trail, mark)
+    return False
+
+
+def search_ordered(board, tables, degree=True, lcv=True, restarts=0, max_nodes=100, seed=None):
+    """Solve a board in place like search_inplace(), with configurable branching order
+
+    Parameters
+    ----------
+    board(list)
+        a list of candidate masks; it is modified in place
+
+    tables(Tables)
+        the index tables from make_tables()
+
+    degree(bool)
+        break ties between the boxes with the fewest candidates in favour of
+        the one with the most unsolved peers
+
+    lcv(bool)
+        try the digits of a box in least-constraining order, i.e. the digits
+        that are candidates in the fewest peers first
+
+    restarts(int)
+        the number of randomized attempts made before a complete search; the
+        remaining ties are broken at random and attempt k gives up after
+        max_nodes * 2 ** k nodes, so an unlucky first branch is abandoned early
+
+    max_nodes(int)
+        the node budget of the first randomized attempt
+
+    seed(int)
+        the seed of the random tie-breaking (only used with restarts)
+
+    Returns
+    -------
+    list or False
+        The solved board or False if no solution exists
+    """
+    if propagate(board, tables) is False:
+        return False
+    rng = random.Random(seed) if restarts else None
+    for attempt in range(restarts):
+        attempt_board = board[:]
+        result = _search_ordered(attempt_board, tables, degree, lcv, rng, max_nodes * 2 ** attempt)
+        if result is not None:
+            board[:] = attempt_board
+            return board if result else False
+    return board if _search_ordered(board, tables, degree, lcv, rng, None) else False
+
+
+def _search_ordered(board, tables, degree, lcv, rng, max_nodes):
+    """Depth first search behind search_ordered(); returns None once max_nodes are expanded """
+    peers, count_bits = tables.peers, tables.count
+    trail = []
+    nodes = 0
+
+    def select():
+        best, fewest = [], None
+        for box, mask in enumerate(board):
+            count = count_bits(mask)
+            if count > 1:
+                if fewest is None or count < fewest:
+                    best, fewest = [box], count
+                elif count == fewest:
+                    best.append(box)
+        if degree and len(best) > 1:
+            degrees = [sum(1 for peer in peers[box] if count_bits(board[peer]) > 1) for box in best]
+            most = max(degrees)
+            best = [box for box, d in zip(best, degrees) if d == most]
+        if not best:
+            return None
+        return rng.choice(best) if rng is not None else best[0]
+
+    def order(box):
+        bits = []
+        mask = board[box]
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            bits.append(bit)
+        if rng is not None:
+            rng.shuffle(bits)
+        if lcv:
+            # peers are propagated, so only unsolved peers can hold the digit
+            bits.sort(key=lambda bit: sum(1 for peer in peers[box] if board[peer] & bit))
+        return bits
+
+    def branch():
+        nonlocal nodes
+        nodes += 1
+        counters['nodes'] += 1
+        box = select()
+        if box is None:
+            return True
+        if max_nodes is not None and nodes > max_nodes:
+            return None
+        mark = len(trail)
+        for bit in order(box):
+            trail.append((box, board[box]))
+            board[box] = bit
+            if propagate(board, tables, [box], trail):
+                result = branch()
+                if result:
+                    return True
+                if result is None:
+                    undo(board, trail, mark)
+                    return None
+            counters['backtracks'] += 1
+            undo(board, trail, mark)
+        return False
+
+    return branch()
+
+
+def count_solutions(board, tables, limit=2, trail=None):
+    """Count the solutions of a board, stopping as soon as limit are found
+
+    The search is the same as in search_inplace(), but it carries on past the
+    first solution. The board is modified in place and ends up propagated but
+    not necessarily solved.
+
+    Parameters
+    ----------
+    board(list)
+        a list of candidate masks
+
+    tables(Tables)
+        the index tables from make_tables()
+
+    limit(int)
+        the number of solutions after which to stop searching
+
+    trail(list)
+        the undo trail shared by the recursion (a new one is started if omitted)
+
+    Returns
+    -------
+    int
+        the number of solutions found, at most limit
+    """
+    counters['nodes'] += 1
+    if trail is None:
+        if propagate(board, tables) is False:
+            return 0
+        trail = []
+
+    count_bits = tables.count
+    best = None
+    for box, mask in enumerate(board):
+        count = count_bits(mask)
+        if count > 1 and (best is None or count < best[0]):
+            best = (count, box)
+    if best is None:
+        return 1
+
+    box = best[1]
+    mask = board[box]
+    mark = len(trail)
+    found = 0
+    while mask and found < limit:
+        bit = mask & -mask
+        mask ^= bit
+        trail.append((box, board[box]))
+        board[box] = bit
+        if propagate(board, tables, [box], trail):
+            found += count_solutions(board, tables, limit - found, trail)
+        undo(board, trail, mark)
+    return found
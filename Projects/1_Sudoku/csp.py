@@ -0,0 +1,375 @@
+"""A generic finite-domain constraint satisfaction engine with bitset domains.
+
+All the variables of a problem draw their values from one shared list, and
+the domain of a variable is an integer whose bit k is set while values[k] is
+still allowed, as in the Sudoku bitboards. Binary constraints are compiled
+once into support tables: for every arc (a, b) and every value index i of a,
+the mask of the values of b compatible with a = values[i]. Revising an arc
+is then one AND per remaining value, and forward checking one AND per
+neighbour.
+
+Backtracking search picks variables by minimum remaining values, with ties
+broken by degree, and tries values in least-constraining-value order. After
+each assignment it runs forward checking or maintains arc consistency (AC-3).
+
+Sudoku, map coloring and N-queens instances are built by sudoku(),
+map_coloring() and n_queens():
+
+    problem = map_coloring({'WA': ['NT', 'SA'], ...}, ['red', 'green', 'blue'])
+    problem.solve()
+
+Like every project of this repository, the module is self-contained: its
+only consumer is the Sudoku solver (solve(grid, backend='csp') in
+solution.py). The 5_Sudoku_v2 notebook and the constraint satisfaction notes
+keep their own implementations.
+"""
+from collections import deque
+from operator import ne
+
+
+def _count_bits(mask):
+    return bin(mask).count('1')
+
+
+def _index(bit):
+    return bit.bit_length() - 1
+
+
+class CSP:
+    """A binary constraint satisfaction problem over a shared list of values
+
+    Parameters
+    ----------
+    variables(list)
+        the (hashable) variable names
+
+    values(list)
+        every value a variable may take
+
+    domains(dict)
+        the allowed values of some variables (the others may take any value)
+
+    Attributes
+    ----------
+    stats(dict)
+        the number of search 'nodes' expanded and of 'backtracks' of the last
+        call to solve()
+    """
+    def __init__(self, variables, values, domains=None):
+        self.variables = list(variables)
+        self.values = list(values)
+        self.index = {var: i for i, var in enumerate(self.variables)}
+        self.full = (1 << len(self.values)) - 1
+        self.domains = [self.full] * len(self.variables)
+        self.neighbors = [[] for _ in self.variables]
+        self.supports = {}
+        self.stats = {'nodes': 0, 'backtracks': 0}
+        # the support table of the != constraint, shared by every such arc
+        self._different = tuple(self.full & ~(1 << i) for i in range(len(self.values)))
+        value_index = {value: i for i, value in enumerate(self.values)}
+        for var, allowed in (domains or {}).items():
+            mask = 0
+            for value in allowed:
+                mask |= 1 << value_index[value]
+            self.domains[self.index[var]] = mask
+
+    def _add_supports(self, a, b, forward, backward):
+        if (a, b) in self.supports:
+            forward = tuple(x & y for x, y in zip(self.supports[(a, b)], forward))
+            backward = tuple(x & y for x, y in zip(self.supports[(b, a)], backward))
+        else:
+            self.neighbors[a].append(b)
+            self.neighbors[b].append(a)
+        self.supports[(a, b)] = forward
+        self.supports[(b, a)] = backward
+
+    def add_constraint(self, x, y, predicate):
+        """Constrain two variables with a predicate
+
+        Parameters
+        ----------
+        x, y(hashable)
+            the constrained variables
+
+        predicate(callable)
+            takes a value of x and a value of y and returns whether they are
+            compatible; several constraints on the same pair are combined
+        """
+        a, b = self.index[x], self.index[y]
+        if a == b:
+            raise ValueError('A constraint needs two distinct variables, got {!r} twice'.format(x))
+        if predicate is ne:
+            self._add_supports(a, b, self._different, self._different)
+            return
+        values = self.values
+        forward = [0] * len(values)
+        backward = [0] * len(values)
+        for i, u in enumerate(values):
+            for j, v in enumerate(values):
+                if predicate(u, v):
+                    forward[i] |= 1 << j
+                    backward[j] |= 1 << i
+        self._add_supports(a, b, tuple(forward), tuple(backward))
+
+    def add_all_different(self, variables):
+        """Constrain a group of variables to take pairwise different values """
+        variables = list(variables)
+        for k, x in enumerate(variables):
+            for y in variables[k + 1:]:
+                self.add_constraint(x, y, ne)
+
+    def revise(self, domains, a, b, trail=None):
+        """Remove the values of a without support in the domain of b
+
+        Returns
+        -------
+        bool
+            whether the domain of a changed
+        """
+        support, domain_b = self.supports[(a, b)], domains[b]
+        mask = remaining = domains[a]
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            if not support[_index(bit)] & domain_b:
+                mask ^= bit
+        if mask == domains[a]:
+            return False
+        if trail is not None:
+            trail.append((a, domains[a]))
+        domains[a] = mask
+        return True
+
+    def ac3(self, domains, arcs=None, trail=None):
+        """Make the domains arc consistent
+
+        Parameters
+        ----------
+        domains(list)
+            the domain masks, indexed like the variables; narrowed in place
+
+        arcs(iterable)
+            the (a, b) pairs of variable indices to revise first; every arc
+            when omitted
+
+        trail(list)
+            if given, a (variable, old_mask) entry is appended for every
+            narrowed domain, so the changes can be rolled back with undo()
+
+        Returns
+        -------
+        bool
+            False if some domain was emptied
+        """
+        queue = deque(self.supports if arcs is None else arcs)
+        queued = set(queue)
+        while queue:
+            arc = queue.popleft()
+            queued.discard(arc)
+            a, b = arc
+            if self.revise(domains, a, b, trail):
+                if not domains[a]:
+                    return False
+                for c in self.neighbors[a]:
+                    if c != b and (c, a) not in queued:
+                        queued.add((c, a))
+                        queue.append((c, a))
+        return True
+
+    def forward_check(self, domains, var, assigned, trail=None):
+        """Remove the values conflicting with the assignment of var from its unassigned neighbours
+
+        Returns
+        -------
+        bool
+            False if some domain was emptied
+        """
+        support = self.supports
+        i = _index(domains[var])
+        for b in self.neighbors[var]:
+            if assigned[b]:
+                continue
+            mask = domains[b] & support[(var, b)][i]
+            if mask != domains[b]:
+                if not mask:
+                    return False
+                if trail is not None:
+                    trail.append((b, domains[b]))
+                domains[b] = mask
+        return True
+
+    def select_variable(self, domains, assigned):
+        """Return the unassigned variable with the fewest values (then the most unassigned neighbours) """
+        best, best_key = None, None
+        for var, mask in enumerate(domains):
+            if assigned[var]:
+                continue
+            key = _count_bits(mask)
+            if best_key is not None and key > best_key[0]:
+                continue
+            degree = sum(1 for b in self.neighbors[var] if not assigned[b])
+            if best_key is None or (key, -degree) < best_key:
+                best, best_key = var, (key, -degree)
+        return best
+
+    def order_values(self, domains, var, assigned):
+        """Return the value bits of var, least constraining (fewest values removed from neighbours) first """
+        support = self.supports
+        neighbors = [b for b in self.neighbors[var] if not assigned[b]]
+        bits = []
+        mask = domains[var]
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            i = _index(bit)
+            removed = sum(_count_bits(domains[b] & ~support[(var, b)][i]) for b in neighbors)
+            bits.append((removed, bit))
+        bits.sort()
+        return [bit for _, bit in bits]
+
+    def solve(self, inference='forward_checking', lcv=True):
+        """Find an assignment satisfying every constraint with backtracking search
+
+        Parameters
+        ----------
+        inference(string)
+            what to propagate after each assignment: 'forward_checking', 'mac'
+            (maintain arc consistency with AC-3) or None (only check the
+            assignment against the assigned neighbours)
+
+        lcv(bool)
+            try values in least-constraining-value order rather than in the
+            order of the values list
+
+        Returns
+        -------
+        dict or None
+            the value of every variable, or None if there is no solution
+        """
+        if inference not in ('forward_checking', 'mac', None):
+            raise ValueError('Unknown inference: {}'.format(inference))
+        self.stats = {'nodes': 0, 'backtracks': 0}
+        domains = list(self.domains)
+        if not self.ac3(domains):
+            return None
+        assigned = [False] * len(domains)
+        if not self._backtrack(domains, assigned, [], inference, lcv):
+            return None
+        return {var: self.values[_index(mask)] for var, mask in zip(self.variables, domains)}
+
+    def _backtrack(self, domains, assigned, trail, inference, lcv):
+        var = self.select_variable(domains, assigned)
+        if var is None:
+            return True
+        self.stats['nodes'] += 1
+        assigned[var] = True
+        if lcv:
+            bits = self.order_values(domains, var, assigned)
+        else:
+            bits = [1 << i for i in range(len(self.values)) if domains[var] >> i & 1]
+        mark = len(trail)
+        for bit in bits:
+            trail.append((var, domains[var]))
+            domains[var] = bit
+            if inference == 'forward_checking':
+                consistent = self.forward_check(domains, var, assigned, trail)
+            elif inference == 'mac':
+                consistent = self.ac3(domains, [(b, var) for b in self.neighbors[var]], trail)
+            else:
+                consistent = all(self.supports[(var, b)][_index(bit)] & domains[b]
+                                 for b in self.neighbors[var] if assigned[b])
+            if consistent and self._backtrack(domains, assigned, trail, inference, lcv):
+                return True
+            self.stats['backtracks'] += 1
+            undo(domains, trail, mark)
+        assigned[var] = False
+        return False
+
+
+def undo(domains, trail, mark):
+    """Roll the domains back to the state they had when the trail had length mark """
+    while len(trail) > mark:
+        var, mask = trail.pop()
+        domains[var] = mask
+
+
+def sudoku(grid, boxes, unitlist, digits='123456789'):
+    """Build the CSP of a Sudoku puzzle
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid ('.' for empty boxes)
+
+    boxes(list)
+        a list of strings identifying each box on a sudoku board, in grid order
+
+    unitlist(list)
+        a list containing "units" (rows, columns, diagonals, etc.) of boxes;
+        the boxes of every unit must all be different
+
+    digits(string)
+        the symbols that may be placed in a box
+
+    Returns
+    -------
+    CSP
+        the problem, with a variable per box taking single-character values
+    """
+    givens = {box: value for box, value in zip(boxes, grid) if value != '.'}
+    problem = CSP(boxes, digits, givens)
+    pairs = set()
+    for unit in unitlist:
+        for k, a in enumerate(unit):
+            for b in unit[k + 1:]:
+                pair = (a, b) if a < b else (b, a)
+                if pair not in pairs:
+                    pairs.add(pair)
+                    problem.add_constraint(a, b, ne)
+    return problem
+
+
+def map_coloring(neighbors, colors):
+    """Build the CSP of coloring a map so that neighbouring regions differ
+
+    Parameters
+    ----------
+    neighbors(dict)
+        the regions bordering each region (listing a border once is enough)
+
+    colors(list)
+        the available colors
+
+    Returns
+    -------
+    CSP
+        the problem, with a variable per region
+    """
+    regions = list(neighbors)
+    regions += sorted({b for bs in neighbors.values() for b in bs} - set(regions))
+    problem = CSP(regions, colors)
+    for a, bs in neighbors.items():
+        for b in bs:
+            if (problem.index[a], problem.index[b]) not in problem.supports:
+                problem.add_constraint(a, b, ne)
+    return problem
+
+
+def n_queens(n):
+    """Build the CSP of placing n non-attacking queens on an n x n board
+
+    Returns
+    -------
+    CSP
+        the problem, with a variable per row (0 to n - 1) whose value is the
+        column of the queen in that row
+    """
+    problem = CSP(range(n), range(n))
+    full = problem.full
+    for d in range(1, n):
+        # the support table of two rows d apart, built directly rather than from a
+        # predicate since compiling n^2 pairs of predicates costs O(n^4)
+        support = tuple(full & ~(1 << c | 1 << (c + d) | (1 << (c - d) if c >= d else 0)) for c in range(n))
+        for r1 in range(n - d):
+            problem._add_supports(r1, r1 + d, support, support)
+    return problem
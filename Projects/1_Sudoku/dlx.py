@@ -0,0 +1,186 @@
+"""Exact cover backend for the Sudoku solver (Knuth's Algorithm X with Dancing Links).
+
+Every candidate digit of a box is a row of the exact cover matrix. Each row
+covers one "box is filled" column plus one "unit holds this digit" column for
+every unit the box belongs to, so the diagonal units are encoded the same way
+as the rows, columns and squares.
+
+The matrix is stored as parallel lists of left/right/up/down links rather than
+node objects, which keeps covering and uncovering to a few list assignments.
+"""
+
+
+class DancingLinks:
+    """A sparse 0/1 matrix that supports covering and uncovering columns
+
+    Parameters
+    ----------
+    n_columns(int)
+        the number of columns; all columns are primary (covered exactly once)
+
+    rows(iterable)
+        (row_id, columns) pairs, where columns lists the column numbers that
+        the row covers
+    """
+    def __init__(self, n_columns, rows):
+        # node 0 is the root and nodes 1..n_columns are the column headers
+        n = n_columns + 1
+        self.L = [i - 1 for i in range(n)]
+        self.R = [i + 1 for i in range(n)]
+        self.L[0], self.R[-1] = n_columns, 0
+        self.U = list(range(n))
+        self.D = list(range(n))
+        self.C = list(range(n))
+        self.S = [0] * n
+        self.row = [None] * n
+        for row_id, columns in rows:
+            first = None
+            for column in columns:
+                self._append(row_id, column + 1, first)
+                if first is None:
+                    first = len(self.C) - 1
+
+    def _append(self, row_id, c, first):
+        L, R, U, D = self.L, self.R, self.U, self.D
+        node = len(self.C)
+        self.C.append(c)
+        self.row.append(row_id)
+        U.append(U[c])
+        D.append(c)
+        D[U[c]] = node
+        U[c] = node
+        self.S[c] += 1
+        if first is None:
+            L.append(node)
+            R.append(node)
+        else:
+            L.append(L[first])
+            R.append(first)
+            R[L[first]] = node
+            L[first] = node
+
+    def cover(self, c):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        L[R[c]] = L[c]
+        R[L[c]] = R[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                U[D[j]] = U[j]
+                D[U[j]] = D[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def uncover(self, c):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                U[D[j]] = j
+                D[U[j]] = j
+                j = L[j]
+            i = U[i]
+        L[R[c]] = c
+        R[L[c]] = c
+
+    def solutions(self):
+        """Yield every exact cover as a list of row ids
+
+        The column with the fewest remaining rows is covered first. The list
+        yielded is reused by the search, so copy it if it must be kept.
+        """
+        L, R, D, C, S = self.L, self.R, self.D, self.C, self.S
+        chosen = []
+
+        def search():
+            if R[0] == 0:
+                yield chosen
+                return
+            c, j = R[0], R[R[0]]
+            while j != 0:
+                if S[j] < S[c]:
+                    c = j
+                j = R[j]
+            if S[c] == 0:
+                return
+            self.cover(c)
+            r = D[c]
+            while r != c:
+                chosen.append(self.row[r])
+                j = R[r]
+                while j != r:
+                    self.cover(C[j])
+                    j = R[j]
+                for solution in search():
+                    yield solution
+                j = L[r]
+                while j != r:
+                    self.uncover(C[j])
+                    j = L[j]
+                chosen.pop()
+                r = D[r]
+            self.uncover(c)
+
+        return search()
+
+
+def exact_cover(board, tables):
+    """Build the exact cover matrix of a board
+
+    Parameters
+    ----------
+    board(list)
+        a list of candidate masks
+
+    tables(Tables)
+        the index tables from bitboard.make_tables()
+
+    Returns
+    -------
+    DancingLinks
+        the matrix, with one row (box, bit) for each candidate digit of each box
+    """
+    n_boxes, n_digits = len(board), len(tables.digits)
+
+    def rows():
+        for box, mask in enumerate(board):
+            units = tables.box_units[box]
+            for k in range(n_digits):
+                if mask >> k & 1:
+                    yield (box, 1 << k), [box] + [n_boxes + u * n_digits + k for u in units]
+
+    return DancingLinks(n_boxes + len(tables.units) * n_digits, rows())
+
+
+def solutions(board, tables):
+    """Yield every solution of a board as a new board """
+    for chosen in exact_cover(board, tables).solutions():
+        solved = [0] * len(board)
+        for box, bit in chosen:
+            solved[box] = bit
+        yield solved
+
+
+def search(board, tables):
+    """Solve a board with Dancing Links
+
+    Parameters
+    ----------
+    board(list)
+        a list of candidate masks
+
+    tables(Tables)
+        the index tables from bitboard.make_tables()
+
+    Returns
+    -------
+    list or False
+        The solved board or False if no solution exists
+    """
+    for solved in solutions(board, tables):
+        return solved
+    return False
@@ -0,0 +1,317 @@
+"""Generate diagonal Sudoku puzzles with a unique solution, graded by difficulty.
+
+A puzzle starts out as a random full grid. Clues are then removed in random
+order, putting back any clue whose removal allows a second solution or makes
+the puzzle harder than the difficulty aimed at. The puzzle is rated by
+replaying the solver strategies from the simplest up and recording which
+ones were needed, and how often, to solve it:
+
+    easy     eliminate alone
+    medium   eliminate and only choice
+    hard     naked twins too
+    expert   search was needed
+
+Run `python generator.py easy=100 expert=10 -j 4` to print puzzles as
+"difficulty grid" lines until every bucket holds the requested count.
+"""
+import argparse
+import os
+import random
+import sys
+from functools import partial
+from multiprocessing import Pool
+
+import bitboard
+from utils import imap_bounded
+
+
+DIFFICULTIES = ('easy', 'medium', 'hard', 'expert')
+
+STRATEGIES = (
+    ('eliminate', bitboard.eliminate),
+    ('only_choice', bitboard.only_choice),
+    ('naked_twins', bitboard.naked_twins),
+)
+
+
+def random_solution(tables, rng):
+    """Return a random solved board
+
+    Parameters
+    ----------
+    tables(Tables)
+        the index tables from bitboard.get_tables()
+
+    rng(random.Random)
+        the source of randomness
+
+    Returns
+    -------
+    list
+        a solved board
+    """
+    board = [tables.full] * len(tables.boxes)
+    trail = []
+    count_bits = tables.count
+
+    def fill():
+        unsolved = [box for box, mask in enumerate(board) if count_bits(mask) > 1]
+        if not unsolved:
+            return True
+        fewest = min(count_bits(board[box]) for box in unsolved)
+        box = rng.choice([box for box in unsolved if count_bits(board[box]) == fewest])
+        bits = [1 << k for k in range(len(tables.digits)) if board[box] >> k & 1]
+        rng.shuffle(bits)
+        mark = len(trail)
+        for bit in bits:
+            trail.append((box, board[box]))
+            board[box] = bit
+            if bitboard.propagate(board, tables, [box], trail) and fill():
+                return True
+            bitboard.undo(board, trail, mark)
+        return False
+
+    fill()
+    return board
+
+
+def remove_clues(solved, tables, rng, difficulty='expert'):
+    """Empty as many boxes of a solved board as possible while keeping the solution unique
+
+    Parameters
+    ----------
+    solved(list)
+        a solved board
+
+    tables(Tables)
+        the index tables from bitboard.get_tables()
+
+    rng(random.Random)
+        the source of randomness (decides the order in which clues are tried)
+
+    difficulty(string)
+        the hardest rating the puzzle may get: a clue whose removal makes the
+        puzzle rate harder is kept too (the puzzle may still rate easier)
+
+    Returns
+    -------
+    list
+        the puzzle, with tables.full in every empty box
+    """
+    hardest = DIFFICULTIES.index(difficulty)
+    # any puzzle rates expert at most, so only easier targets rate every candidate
+    capped = hardest < len(DIFFICULTIES) - 1
+    puzzle = solved[:]
+    order = list(range(len(puzzle)))
+    rng.shuffle(order)
+    for box in order:
+        clue = puzzle[box]
+        puzzle[box] = tables.full
+        if (bitboard.count_solutions(puzzle[:], tables, limit=2) != 1
+                or capped and DIFFICULTIES.index(rate(puzzle, tables)[0]) > hardest):
+            puzzle[box] = clue
+    return puzzle
+
+
+def rate(board, tables):
+    """Rate a puzzle by the strategies needed to solve it
+
+    The strategies are applied one at a time, always restarting from the
+    simplest one as soon as a strategy makes progress, until the board is
+    solved or no strategy changes it any more (then search is needed).
+
+    Parameters
+    ----------
+    board(list)
+        the puzzle; it is not modified
+
+    tables(Tables)
+        the index tables from bitboard.get_tables()
+
+    Returns
+    -------
+    tuple
+        the difficulty (one of DIFFICULTIES) and a dict counting how many times
+        each strategy made progress ('search' is 1 if search was needed)
+    """
+    board = board[:]
+    counts = {name: 0 for name, _ in STRATEGIES}
+    counts['search'] = 0
+    while not bitboard.is_solved(board):
+        for name, strategy in STRATEGIES:
+            before = board[:]
+            strategy(board, tables)
+            if board != before:
+                counts[name] += 1
+                break
+        else:
+            counts['search'] = 1
+            break
+        if 0 in board:
+            raise ValueError('The puzzle has no solution')
+
+    if counts['search']:
+        difficulty = 'expert'
+    elif counts['naked_twins']:
+        difficulty = 'hard'
+    elif counts['only_choice']:
+        difficulty = 'medium'
+    else:
+        difficulty = 'easy'
+    return difficulty, counts
+
+
+def generate_one(seed, size=9, diagonal=True, difficulty='expert'):
+    """Generate and rate a single puzzle
+
+    Parameters
+    ----------
+    seed(int)
+        the random seed; the same seed always gives the same puzzle
+
+    size(int)
+        the number of boxes per row (9, 16 or 25)
+
+    diagonal(bool)
+        whether the two main diagonals are units
+
+    difficulty(string)
+        the difficulty aimed at: clues are removed as long as the puzzle rates
+        no harder than this (it may still rate easier)
+
+    Returns
+    -------
+    tuple
+        the puzzle as a grid string, its difficulty and its strategy counts
+    """
+    tables = bitboard.get_tables(size, diagonal)
+    rng = random.Random(seed)
+    puzzle = remove_clues(random_solution(tables, rng), tables, rng, difficulty)
+    difficulty, counts = rate(puzzle, tables)
+    return bitboard.board2grid(puzzle, tables), difficulty, counts
+
+
+def _generate_job(job, size, diagonal):
+    """Generate one puzzle from a (seed, difficulty) pair (a picklable worker task) """
+    seed, difficulty = job
+    return generate_one(seed, size, diagonal, difficulty)
+
+
+def generate(targets, processes=None, seed=0, size=9, diagonal=True, max_puzzles=None, max_misses=1000):
+    """Generate puzzles across worker processes until every difficulty bucket is full
+
+    Each puzzle aims at one of the difficulties still missing, in turn, so easy
+    buckets fill as readily as expert ones.
+
+    Parameters
+    ----------
+    targets(dict)
+        the number of puzzles wanted per difficulty, e.g. {'easy': 10, 'expert': 2}
+
+    processes(int)
+        the number of worker processes (defaults to the number of CPUs); with 1
+        the puzzles are generated in the calling process
+
+    seed(int)
+        puzzle i is generated from seed + i, so runs are reproducible
+
+    size(int)
+        the number of boxes per row (9, 16 or 25)
+
+    diagonal(bool)
+        whether the two main diagonals are units
+
+    max_puzzles(int)
+        give up after generating this many puzzles (buckets may then be short)
+
+    max_misses(int)
+        fail after this many puzzles in a row that fill no bucket
+
+    Yields
+    ------
+    tuple
+        (grid, difficulty, counts) for every puzzle kept, as soon as it is ready
+
+    Raises
+    ------
+    RuntimeError
+        if max_misses puzzles in a row fill no bucket
+    """
+    unknown = set(targets) - set(DIFFICULTIES)
+    if unknown:
+        raise ValueError('Unknown difficulties: {}'.format(', '.join(sorted(unknown))))
+    missing = {difficulty: n for difficulty, n in targets.items() if n > 0}
+    if not missing:
+        return
+
+    def jobs():
+        i = 0
+        while max_puzzles is None or i < max_puzzles:
+            wanted = [difficulty for difficulty in DIFFICULTIES if difficulty in missing]
+            if not wanted:
+                return
+            yield seed + i, wanted[i % len(wanted)]
+            i += 1
+
+    if processes == 1:
+        pool = None
+        results = (generate_one(s, size, diagonal, difficulty) for s, difficulty in jobs())
+    else:
+        processes = processes or os.cpu_count() or 1
+        pool = Pool(processes)
+        results = imap_bounded(pool, partial(_generate_job, size=size, diagonal=diagonal), jobs(),
+                               2 * processes)
+    misses = 0
+    try:
+        for grid, difficulty, counts in results:
+            if missing.get(difficulty):
+                misses = 0
+                missing[difficulty] -= 1
+                if not missing[difficulty]:
+                    del missing[difficulty]
+                yield grid, difficulty, counts
+            else:
+                misses += 1
+                if misses >= max_misses:
+                    raise RuntimeError('{} puzzles in a row filled no bucket, still missing: {}'.format(
+                        misses, ', '.join('{}={}'.format(d, n) for d, n in sorted(missing.items()))))
+            if not missing:
+                break
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate graded diagonal Sudoku puzzles.')
+    parser.add_argument('targets', nargs='+', metavar='DIFFICULTY=COUNT',
+                        help='number of puzzles wanted per difficulty ({})'.format(', '.join(DIFFICULTIES)))
+    parser.add_argument('-j', '--processes', type=int, default=None,
+                        help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first puzzle')
+    parser.add_argument('--size', type=int, default=9, help='boxes per row (9, 16 or 25)')
+    parser.add_argument('--no-diagonal', dest='diagonal', action='store_false',
+                        help='generate standard sudokus, without the diagonal units')
+    parser.add_argument('--max-puzzles', type=int, default=None, help='give up after this many puzzles')
+    parser.add_argument('--max-misses', type=int, default=1000,
+                        help='fail after this many puzzles in a row that fill no bucket')
+    args = parser.parse_args(argv)
+
+    targets = {}
+    for target in args.targets:
+        difficulty, _, count = target.partition('=')
+        if difficulty not in DIFFICULTIES or not count.isdigit():
+            parser.error('invalid target: {}'.format(target))
+        targets[difficulty] = int(count)
+
+    try:
+        for grid, difficulty, _ in generate(targets, args.processes, args.seed, args.size, args.diagonal,
+                                            args.max_puzzles, args.max_misses):
+            sys.stdout.write('{} {}\n'.format(difficulty, grid))
+            sys.stdout.flush()
+    except RuntimeError as e:
+        parser.exit(1, 'generator.py: {}\n'.format(e))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""Long-running Sudoku solving daemon speaking JSON lines.
+
+Each request is one JSON object per line:
+
+    {"id": 1, "grid": "2.............62....1....7...", "backend": "dlx", "diagonal": true}
+
+and each response is one JSON object per line, written as soon as the puzzle
+is solved (so not necessarily in request order):
+
+    {"id": 1, "solution": "267945381853716249...", "latency_ms": 1.92}
+
+"solution" is null when the puzzle has no solution, and an "error" field
+replaces it when the request is invalid or solving it failed. Requests are read from stdin (the
+default) or from clients of a Unix socket (--socket PATH), and are solved by
+a pool of worker processes started once, with the unit and peer tables
+already built, so no request pays for interpreter startup or table setup.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from timeit import default_timer as timer
+
+import bitboard
+import solution
+
+
+def solve_request(request):
+    """Solve one decoded request in a worker, returning the response without latency """
+    response = {'id': request.get('id')}
+    try:
+        grid = request['grid']
+        grid_tables = solution.get_tables(grid, request.get('diagonal', True))
+        backend = solution.backends[request.get('backend', 'propagation')]
+        board = backend(bitboard.grid2board(grid, grid_tables), grid_tables)
+    except Exception as e:
+        # any failure is reported, so the client still gets an answer for this id
+        response['error'] = '{}: {}'.format(type(e).__name__, e)
+        return response
+    response['solution'] = None if board is False else bitboard.board2grid(board, grid_tables)
+    return response
+
+
+def _warm_up():
+    """Make a worker process build the 9x9 diagonal tables before the first request """
+    return len(solution.tables.boxes)
+
+
+async def serve(reader, write, executor, max_pending=64):
+    """Answer the JSON-lines requests of one stream until it is closed
+
+    Parameters
+    ----------
+    reader(asyncio.StreamReader)
+        the stream of requests
+
+    write(callable)
+        called with each encoded response line (bytes)
+
+    executor(concurrent.futures.Executor)
+        the pool solving the puzzles
+
+    max_pending(int)
+        the maximum number of requests being solved at once; reading pauses
+        while it is reached, which bounds memory use for fast producers
+    """
+    loop = asyncio.get_event_loop()
+    slots = asyncio.Semaphore(max_pending)
+    pending = set()
+
+    async def handle(line, start):
+        try:
+            try:
+                request = json.loads(line.decode('utf-8'))
+                if not isinstance(request, dict):
+                    raise ValueError('a request must be a JSON object')
+            except ValueError as e:
+                response = {'id': None, 'error': 'invalid request: {}'.format(e)}
+            else:
+                try:
+                    response = await loop.run_in_executor(executor, solve_request, request)
+                except Exception as e:
+                    # e.g. a worker died, or the request could not be sent to it
+                    response = {'id': request.get('id'), 'error': '{}: {}'.format(type(e).__name__, e)}
+            response['latency_ms'] = round((timer() - start) * 1000, 3)
+            write((json.dumps(response) + '\n').encode('utf-8'))
+        finally:
+            slots.release()
+
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+        start = timer()
+        await slots.acquire()
+        task = asyncio.ensure_future(handle(line, start))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.wait(pending)
+
+
+async def serve_stdin(executor, max_pending):
+    """Answer the requests read from stdin, writing the responses to stdout """
+    loop = asyncio.get_event_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+    def write(data):
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+
+    await serve(reader, write, executor, max_pending)
+
+
+async def serve_socket(path, executor, max_pending):
+    """Answer the requests of every client connecting to a Unix socket, until cancelled """
+    async def client(reader, writer):
+        try:
+            await serve(reader, writer.write, executor, max_pending)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_unix_server(client, path=path)
+    try:
+        # serve until the daemon is interrupted
+        await asyncio.Event().wait()
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve Sudoku solutions over JSON lines.')
+    parser.add_argument('--socket', help='listen on this Unix socket instead of reading stdin')
+    parser.add_argument('-j', '--processes', type=int, default=None,
+                        help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('--max-pending', type=int, default=64,
+                        help='maximum number of requests being solved at once per client')
+    args = parser.parse_args(argv)
+
+    processes = args.processes or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(processes)
+    # start every worker now rather than on the first requests
+    for future in [executor.submit(_warm_up) for _ in range(processes)]:
+        future.result()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        if args.socket:
+            loop.run_until_complete(serve_socket(args.socket, executor, args.max_pending))
+        else:
+            loop.run_until_complete(serve_stdin(executor, args.max_pending))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.close()
+        executor.shutdown()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,14 @@
+import argparse
+import os
+import sys
+from functools import partial
+from multiprocessing import Pool
+from timeit import default_timer as timer
 
 from utils import *
+import bitboard
+import csp
+import dlx
 
 
 row_units = [cross(r, cols) for r in rows]
@@ -11,6 +20,80 @@ unitlist = row_units + column_units + square_units + diagonal_units
 # Must be called after all units (including diagonals) are added to the unitlist
 units = extract_units(unitlist, boxes)
 peers = extract_peers(units, boxes)
+tables = bitboard.make_tables(boxes, unitlist)
+
+
+class _RecordingBoard(list):
+    """A board that appends every change of a box to the history log, like assign_value
+
+    Copies made with board[:] record too, so the log follows the propagation and
+    search steps of the bitboard engines as they happen, backtracking included.
+    """
+    def __init__(self, board, tables):
+        super().__init__(board)
+        self.tables = tables
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return _RecordingBoard(super().__getitem__(key), self.tables)
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, mask):
+        if isinstance(key, slice):
+            for box, value in zip(range(*key.indices(len(self))), mask):
+                self[box] = value
+            return
+        old = super().__getitem__(key)
+        if old != mask:
+            history.append((self.tables.boxes[key], bitboard.mask2str(old, self.tables),
+                            bitboard.mask2str(mask, self.tables)))
+        super().__setitem__(key, mask)
+
+
+def _batch_search(board, tables):
+    """Solve one board with the vectorized batch engine (numpy is only imported when used) """
+    import batch
+    return batch.solve_batch([board], tables)[0]
+
+
+def _csp_search(board, tables):
+    """Solve one board with the generic CSP engine (maintaining arc consistency) """
+    indices = range(len(board))
+    problem = csp.sudoku(bitboard.board2grid(board, tables), indices, tables.units, tables.digits)
+    assignment = problem.solve('mac')
+    if assignment is None:
+        return False
+    return [1 << tables.digits.index(assignment[i]) for i in indices]
+
+
+# solver engines selectable by name in solve(); each maps a board to a solved board or False
+backends = {
+    'propagation': bitboard.search_inplace,
+    'ordered': bitboard.search_ordered,
+    'dlx': dlx.search,
+    'batch': _batch_search,
+    'csp': _csp_search,
+}
+
+
+def get_tables(grid, diagonal=True):
+    """Return the index tables for the board size of a grid string (81, 256 or 625 characters) """
+    size = int(round(len(grid) ** 0.5))
+    if size * size != len(grid):
+        raise ValueError('A grid must have size x size characters, got {}'.format(len(grid)))
+    if size == len(rows) and diagonal:
+        return tables
+    return bitboard.get_tables(size, diagonal)
+
+
+def _apply(strategy, values):
+    """Run a bitmask strategy on a values dictionary and write the changes back
+    through assign_value (so they are recorded for the visualization)
+    """
+    board = strategy(bitboard.values2board(values, tables), tables)
+    for box, value in bitboard.board2values(board, tables).items():
+        assign_value(values, box, value)
+    return values
 
 
 def naked_twins(values):
@@ -50,17 +133,7 @@ def naked_twins(values):
     Pseudocode for this algorithm on github:
     https://github.com/udacity/artificial-intelligence/blob/master/Projects/1_Sudoku/pseudocode.md
     """
-    for boxA, valA in values.items():
-        if len(valA) != 2:
-            continue
-        for boxB in peers[boxA]:
-            if values[boxB] == valA:
-                for box in (set(peers[boxA]) & set(peers[boxB])):
-                    assign_value(values, box, values[box].replace(valA[0], ''))
-                    assign_value(values, box, values[box].replace(valA[1], ''))
-                    # values[box] = values[box].replace(valA[0], '')
-                    # values[box] = values[box].replace(valA[1], '')
-    return values
+    return _apply(bitboard.naked_twins, values)
 
 
 def eliminate(values):
@@ -79,12 +152,7 @@ def eliminate(values):
     dict
         The values dictionary with the assigned values eliminated from peers
     """
-    for k, v in values.items():
-        if len(v) == 1:
-            for pk in peers[k]:
-                assign_value(values, pk, values[pk].replace(v[0], ''))
-                # values[pk] = values[pk].replace(v[0], '')
-    return values
+    return _apply(bitboard.eliminate, values)
 
 
 def only_choice(values):
@@ -103,13 +171,7 @@ def only_choice(values):
     dict
         The values dictionary with all single-valued boxes assigned
     """
-    for unit in unitlist:
-        for d in '123456789':
-            places = [box for box in unit if d in values[box]]
-            if len(places) == 1:
-                assign_value(values, places[0], d)
-                # values[places[0]] = d
-    return values
+    return _apply(bitboard.only_choice, values)
 
 
 def reduce_puzzle(values):
@@ -126,35 +188,38 @@ def reduce_puzzle(values):
         The values dictionary after continued application of the constraint strategies
         no longer produces any changes, or False if the puzzle is unsolvable 
     """
-    stalled = False
-    while (not stalled):
-        solved_box_before = len([k for k, v in values.items() if len(v) == 1])
-        # print('before', solved_box_before)
-
-        values = eliminate(values)
-        values = only_choice(values)
-        values = naked_twins(values)
-        
-        solved_box_after = len([k for k, v in values.items() if len(v) == 1])
-        # print('after', solved_box_after)
-        
-        stalled = solved_box_before == solved_box_after
-
-        if len([k for k, v in values.items() if len(v) == 0]) > 0:
-            return False
-
-    return values
+    board = bitboard.reduce_puzzle(bitboard.values2board(values, tables), tables)
+    if board is False:
+        return False
+    return bitboard.board2values(board, tables)
 
 
-def search(values):
+def search(values, degree=False, lcv=False, restarts=0, seed=None):
     """Apply depth first search to solve Sudoku puzzles in order to solve puzzles
     that cannot be solved by repeated reduction alone.
 
+    The nodes expanded and backtracks of the run are left in bitboard.counters.
+
     Parameters
     ----------
     values(dict)
         a dictionary of the form {'box_name': '123456789', ...}
 
+    degree(bool)
+        break ties between the boxes with the fewest candidates by the number
+        of unsolved peers rather than by box order
+
+    lcv(bool)
+        try the digits of a box in least-constraining-value order rather than
+        in increasing order
+
+    restarts(int)
+        the number of randomized, node-limited attempts made before a
+        complete search (see bitboard.search_ordered)
+
+    seed(int)
+        the seed of the randomized attempts
+
     Returns
     -------
     dict or False
@@ -165,24 +230,18 @@ def search(values):
     You should be able to complete this function by copying your code from the classroom
     and extending it to call the naked twins strategy.
     """
-    values = reduce_puzzle(values)
-    if values is False:
+    bitboard.reset_counters()
+    board = bitboard.values2board(values, tables)
+    if degree or lcv or restarts:
+        board = bitboard.search_ordered(board, tables, degree, lcv, restarts, seed=seed)
+    else:
+        board = bitboard.search_inplace(board, tables)
+    if board is False:
         return False
+    return bitboard.board2values(board, tables)
 
-    unsolved_boxes = [(len(v), k) for k, v in values.items() if len(v) > 1]
-    if len(unsolved_boxes) == 0:
-        return values
-    
-    _, key = min(unsolved_boxes)
-    for d in values[key]:
-        values_copy = values.copy()
-        values_copy[key] = d
-        return_val = search(values_copy)
-        if return_val:
-            return return_val
-    return False
-
-def solve(grid):
+
+def solve(grid, backend='propagation', diagonal=True, pipeline=None, cache=None):
     """Find the solution to a Sudoku puzzle using search and constraint propagation
 
     Parameters
@@ -192,27 +251,239 @@ def solve(grid):
         
         Ex. '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
 
+        16x16 and 25x25 grids (256 and 625 characters) use the digits
+        '123456789ABCDEFG' and '123456789ABCDEFGHIJKLMNOP' respectively.
+
+    backend(string)
+        the solver engine to use: 'propagation' (depth first search with
+        constraint propagation), 'ordered' (the same search, with degree and
+        least-constraining-value ordering), 'dlx' (exact cover with Dancing Links),
+        'batch' (numpy propagation, which pays off in solve_many()) or 'csp' (the
+        generic engine of csp.py, maintaining arc consistency)
+
+    diagonal(bool)
+        whether the two main diagonals are units
+
+    pipeline(strategies.Pipeline)
+        if given, the search reduces every node with this selection of
+        strategies (and records their counters) instead of using the backend
+
+    cache(symmetry.SolutionCache)
+        if given, puzzles equivalent to one solved before (up to digit
+        relabelling and diagonal-preserving transforms) are answered from it
+
+    While recording is on (see utils.record_history), every change the
+    'propagation' and 'ordered' backends and pipelines make to a box is appended
+    to the history log, in order; the other backends do not record.
+
     Returns
     -------
     dict or False
         The dictionary representation of the final sudoku grid or False if no solution exists.
     """
-    values = grid2values(grid)
-    values = search(values)
-    return values
+    if recording['enabled']:
+        del history[:]
+    grid_tables = get_tables(grid, diagonal)
+    start = bitboard.grid2board(grid, grid_tables)
+    if recording['enabled']:
+        start = _RecordingBoard(start, grid_tables)
+    if cache is not None:
+        key, solved = cache.lookup(grid, grid_tables.digits, diagonal)
+    if cache is not None and solved is not None:
+        board = solved and bitboard.grid2board(solved, grid_tables)
+    elif pipeline is not None:
+        board = bitboard.search(start[:], grid_tables, reduce=pipeline.reduce)
+    else:
+        board = backends[backend](start[:], grid_tables)
+    if cache is not None and solved is None:
+        cache.store(key, board and bitboard.board2grid(board, grid_tables))
+    if not board:
+        return False
+    return bitboard.board2values(board, grid_tables)
 
 
-if __name__ == "__main__":
-    diag_sudoku_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
-    display(grid2values(diag_sudoku_grid))
-    result = solve(diag_sudoku_grid)
-    display(result)
+def count_solutions(grid, limit=2, diagonal=True):
+    """Count the solutions of a Sudoku puzzle, up to a limit
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid (see solve())
+
+    limit(int)
+        the search stops as soon as this many solutions are found, so the
+        default of 2 is enough to tell whether a puzzle has a unique solution
+
+    diagonal(bool)
+        whether the two main diagonals are units
+
+    Returns
+    -------
+    int
+        the number of solutions, or limit if there are at least that many
+    """
+    grid_tables = get_tables(grid, diagonal)
+    return bitboard.count_solutions(bitboard.grid2board(grid, grid_tables), grid_tables, limit)
+
+
+def _solve_chunk(grids, backend='propagation', diagonal=True):
+    """Solve a list of grids, returning the solved grid strings ('' if unsolvable)
+
+    A malformed grid (a bad length or character) gets '' too, without
+    stopping the others. The 'batch' backend propagates all the grids of the
+    same size together.
+    """
+    solved = [''] * len(grids)
+    if backend == 'batch':
+        import batch
+        by_size = {}
+        for i, grid in enumerate(grids):
+            by_size.setdefault(len(grid), []).append(i)
+        for indices in by_size.values():
+            try:
+                grid_tables = get_tables(grids[indices[0]], diagonal)
+            except ValueError:
+                continue
+            valid, boards = [], []
+            for i in indices:
+                try:
+                    boards.append(bitboard.grid2board(grids[i], grid_tables))
+                except ValueError:
+                    continue
+                valid.append(i)
+            for i, board in zip(valid, batch.solve_batch(boards, grid_tables)):
+                if board is not False:
+                    solved[i] = bitboard.board2grid(board, grid_tables)
+        return solved
+
+    for i, grid in enumerate(grids):
+        try:
+            grid_tables = get_tables(grid, diagonal)
+            board = bitboard.grid2board(grid, grid_tables)
+        except ValueError:
+            continue
+        board = backends[backend](board, grid_tables)
+        if board is not False:
+            solved[i] = bitboard.board2grid(board, grid_tables)
+    return solved
+
+
+def _chunks(lines, size):
+    """Group the non-blank lines of a file into lists of at most size grids """
+    chunk = []
+    for line in lines:
+        grid = line.strip()
+        if grid:
+            chunk.append(grid)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def solve_many(infile, outfile, processes=None, chunksize=256, window=None, backend='propagation',
+               diagonal=True):
+    """Solve a stream of Sudoku puzzles with a pool of worker processes
+
+    Parameters
+    ----------
+    infile(iterable)
+        an open file (or any iterable of lines) with one grid per line (81
+        characters, or 256 / 625 for 16x16 / 25x25 boards); blank lines are skipped
+
+    outfile(file)
+        an open file that receives one line per puzzle, in input order, holding
+        the solved grid or an empty line if the puzzle has no solution (or is
+        malformed: a bad length or character)
+
+    processes(int)
+        the number of worker processes (defaults to the number of CPUs); with 1
+        the puzzles are solved in the calling process
+
+    chunksize(int)
+        the number of puzzles sent to a worker at a time
+
+    window(int)
+        the maximum number of chunks in flight (defaults to 4 per process), which
+        bounds memory use regardless of the size of the input
 
+    backend(string)
+        the solver engine to use (see solve())
+
+    diagonal(bool)
+        whether the two main diagonals are units
+
+    Returns
+    -------
+    tuple
+        the number of puzzles solved and the elapsed wall time in seconds
+    """
+    start = timer()
+    count = 0
+    chunks = _chunks(infile, chunksize)
+    solve_chunk = partial(_solve_chunk, backend=backend, diagonal=diagonal)
+    if processes == 1:
+        results, pool = map(solve_chunk, chunks), None
+    else:
+        processes = processes or os.cpu_count() or 1
+        pool = Pool(processes)
+        results = imap_bounded(pool, solve_chunk, chunks, window or 4 * processes)
+    try:
+        for solved in results:
+            for grid in solved:
+                outfile.write(grid + '\n')
+            count += len(solved)
+    finally:
+        if pool is not None:
+            pool.terminate()
+    return count, timer() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve diagonal Sudoku puzzles.')
+    parser.add_argument('infile', nargs='?',
+                        help='file with one grid per line ("-" for stdin); '
+                             'without it the example puzzle is solved and visualized')
+    parser.add_argument('-o', '--outfile', default='-', help='where to write the solutions (default: stdout)')
+    parser.add_argument('-j', '--processes', type=int, default=None,
+                        help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('--chunksize', type=int, default=256, help='puzzles sent to a worker at a time')
+    parser.add_argument('--backend', choices=sorted(backends), default='propagation', help='solver engine')
+    parser.add_argument('--no-diagonal', dest='diagonal', action='store_false',
+                        help='solve standard sudokus, without the diagonal units')
+    args = parser.parse_args(argv)
+
+    if args.infile is None:
+        diag_sudoku_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+        display(grid2values(diag_sudoku_grid))
+        record_history()
+        result = solve(diag_sudoku_grid, args.backend)
+        display(result)
+
+        try:
+            import PySudoku
+            PySudoku.play(grid2values(diag_sudoku_grid), result, history)
+
+        except SystemExit:
+            pass
+        except:
+            print('We could not visualize your board due to a pygame issue. Not a problem! It is not a requirement.')
+        return
+
+    infile = sys.stdin if args.infile == '-' else open(args.infile)
+    outfile = sys.stdout if args.outfile == '-' else open(args.outfile, 'w')
     try:
-        import PySudoku
-        PySudoku.play(grid2values(diag_sudoku_grid), result, history)
+        count, elapsed = solve_many(infile, outfile, args.processes, args.chunksize,
+                                    backend=args.backend, diagonal=args.diagonal)
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+    sys.stderr.write('{} puzzles in {:.2f}s ({:.0f} puzzles/sec)\n'.format(
+        count, elapsed, count / elapsed if elapsed else 0))
 
-    except SystemExit:
-        pass
-    except:
-        print('We could not visualize your board due to a pygame issue. Not a problem! It is not a requirement.')
+
+if __name__ == "__main__":
+    main()
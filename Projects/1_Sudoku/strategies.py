@@ -0,0 +1,266 @@
+"""Registry of Sudoku strategies and a configurable, instrumented reduction pipeline.
+
+Every strategy takes a board and its tables, narrows the board in place and
+returns it, like the strategies in bitboard.py. Besides eliminate, only choice
+and naked twins, the registry holds naked triples, hidden pairs and triples,
+pointing pairs (and box/line reduction) and X-wing.
+
+    pipeline = Pipeline(['eliminate', 'only_choice', 'hidden_pairs'])
+    solution.solve(grid, pipeline=pipeline)
+    print(pipeline.report())
+"""
+from collections import OrderedDict
+from itertools import combinations
+from timeit import default_timer as timer
+
+import bitboard
+
+
+registry = OrderedDict()
+
+
+def register(name):
+    """Decorator adding a strategy function to the registry under the given name """
+    def decorator(strategy):
+        registry[name] = strategy
+        return strategy
+    return decorator
+
+
+register('eliminate')(bitboard.eliminate)
+register('only_choice')(bitboard.only_choice)
+register('naked_twins')(bitboard.naked_twins)
+
+DEFAULT = ('eliminate', 'only_choice', 'naked_twins')
+
+
+_geometry = {}
+
+
+def get_geometry(tables):
+    """Return the derived unit relations needed by the advanced strategies (cached)
+
+    Returns
+    -------
+    tuple
+        the (unit, other unit, shared boxes) triples of units sharing at least
+        two boxes, the row units and the column units
+    """
+    key = (tables.boxes, tables.units)
+    if key not in _geometry:
+        size = len(tables.digits)
+        unit_sets = [set(unit) for unit in tables.units]
+        intersections = []
+        for a, b in combinations(range(len(unit_sets)), 2):
+            shared = unit_sets[a] & unit_sets[b]
+            if len(shared) > 1:
+                intersections.append((a, b, tuple(sorted(shared))))
+                intersections.append((b, a, tuple(sorted(shared))))
+        row_units = [unit for unit in tables.units if len({box // size for box in unit}) == 1]
+        col_units = [unit for unit in tables.units if len({box % size for box in unit}) == 1]
+        _geometry[key] = (intersections, row_units, col_units)
+    return _geometry[key]
+
+
+def _naked_subsets(board, tables, k):
+    """Remove the digits of k boxes of a unit holding k digits between them from the rest of the unit """
+    count = tables.count
+    for unit in tables.units:
+        small = [box for box in unit if 1 < count(board[box]) <= k]
+        for subset in combinations(small, k):
+            digits = 0
+            for box in subset:
+                digits |= board[box]
+            if count(digits) != k:
+                continue
+            for box in unit:
+                if box not in subset:
+                    board[box] &= ~digits
+    return board
+
+
+def _hidden_subsets(board, tables, k):
+    """Restrict k boxes of a unit that are the only places for k digits to those digits """
+    n_digits = len(tables.digits)
+    for unit in tables.units:
+        places = {}
+        for d in range(n_digits):
+            bit = 1 << d
+            boxes = tuple(box for box in unit if board[box] & bit)
+            if 1 < len(boxes) <= k:
+                places[bit] = boxes
+        for bits in combinations(places, k):
+            boxes = set()
+            for bit in bits:
+                boxes.update(places[bit])
+            if len(boxes) != k:
+                continue
+            digits = sum(bits)
+            for box in boxes:
+                board[box] &= digits
+    return board
+
+
+@register('naked_triples')
+def naked_triples(board, tables):
+    """Eliminate the digits of three boxes of a unit that only hold three digits between them """
+    return _naked_subsets(board, tables, 3)
+
+
+@register('hidden_pairs')
+def hidden_pairs(board, tables):
+    """Restrict two boxes that are the only places in a unit for two digits to those digits """
+    return _hidden_subsets(board, tables, 2)
+
+
+@register('hidden_triples')
+def hidden_triples(board, tables):
+    """Restrict three boxes that are the only places in a unit for three digits to those digits """
+    return _hidden_subsets(board, tables, 3)
+
+
+@register('pointing_pairs')
+def pointing_pairs(board, tables):
+    """Apply pointing pairs / box-line reduction to every pair of intersecting units
+
+    If all the places for a digit in one unit lie in its intersection with a
+    second unit, the digit can be removed from the rest of the second unit.
+    """
+    intersections, _, _ = get_geometry(tables)
+    units = tables.units
+    for a, b, shared in intersections:
+        inside = outside = 0
+        for box in shared:
+            inside |= board[box]
+        for box in units[a]:
+            if box not in shared:
+                outside |= board[box]
+        confined = inside & ~outside
+        if not confined:
+            continue
+        for box in units[b]:
+            if box not in shared:
+                board[box] &= ~confined
+    return board
+
+
+@register('x_wing')
+def x_wing(board, tables):
+    """Apply the X-wing strategy to rows and columns
+
+    If a digit has exactly two places in each of two rows, and these places are
+    in the same two columns, the digit can be removed from the rest of both
+    columns (and the same with rows and columns swapped).
+    """
+    _, row_units, col_units = get_geometry(tables)
+    size = len(tables.digits)
+    rows = {unit[0] // size: unit for unit in row_units}
+    cols = {unit[0] % size: unit for unit in col_units}
+    for lines, crossing, position in ((row_units, cols, lambda box: box % size),
+                                      (col_units, rows, lambda box: box // size)):
+        for d in range(size):
+            bit = 1 << d
+            # lines holding the digit in exactly two places, grouped by these places
+            wings = {}
+            for line in lines:
+                places = [box for box in line if board[box] & bit]
+                if len(places) == 2:
+                    wings.setdefault((position(places[0]), position(places[1])), []).append(places)
+            for (p, q), found in wings.items():
+                if len(found) != 2 or p not in crossing or q not in crossing:
+                    continue
+                corners = set(found[0] + found[1])
+                for box in crossing[p] + crossing[q]:
+                    if box not in corners:
+                        board[box] &= ~bit
+    return board
+
+
+def consistent(board, tables):
+    """Return whether no unit repeats a solved digit or lacks a place for some digit
+
+    Strategies other than eliminate never notice two peers solved to the same
+    digit, so the pipeline checks this after reducing a board.
+    """
+    full = tables.full
+    for unit in tables.units:
+        seen = union = 0
+        for box in unit:
+            mask = board[box]
+            union |= mask
+            if not mask & (mask - 1):
+                if seen & mask:
+                    return False
+                seen |= mask
+        if union != full:
+            return False
+    return True
+
+
+class Pipeline:
+    """An ordered selection of registered strategies with per-strategy counters
+
+    Parameters
+    ----------
+    names(iterable)
+        the names of the strategies to apply, in order (defaults to eliminate,
+        only choice and naked twins); without eliminate the search still finds
+        correct solutions, but little more efficiently than plain backtracking
+
+    Attributes
+    ----------
+    stats(OrderedDict)
+        for each strategy name, a dict with the number of 'calls', the total
+        wall time in 'seconds' and the number of candidates 'removed'
+    """
+    def __init__(self, names=DEFAULT):
+        unknown = [name for name in names if name not in registry]
+        if unknown:
+            raise ValueError('Unknown strategies: {}'.format(', '.join(unknown)))
+        self.strategies = [(name, registry[name]) for name in names]
+        self.stats = OrderedDict((name, {'calls': 0, 'seconds': 0.0, 'removed': 0}) for name in names)
+
+    def reduce(self, board, tables):
+        """Apply the strategies in order, over and over, until the board stops changing
+
+        Parameters
+        ----------
+        board(list)
+            a list of candidate masks; it is modified in place
+
+        tables(Tables)
+            the index tables from bitboard.make_tables()
+
+        Returns
+        -------
+        list or False
+            The reduced board, or False if some box ran out of candidates or a
+            unit became inconsistent
+        """
+        count = tables.count
+        remaining = sum(count(mask) for mask in board)
+        changed = True
+        while changed:
+            changed = False
+            for name, strategy in self.strategies:
+                start = timer()
+                strategy(board, tables)
+                stats = self.stats[name]
+                stats['seconds'] += timer() - start
+                stats['calls'] += 1
+                if 0 in board:
+                    return False
+                after = sum(count(mask) for mask in board)
+                if after != remaining:
+                    stats['removed'] += remaining - after
+                    remaining = after
+                    changed = True
+        return board if consistent(board, tables) else False
+
+    def report(self):
+        """Return the counters as a table, one line per strategy """
+        lines = ['{:<16}{:>10}{:>12}{:>12}'.format('strategy', 'calls', 'seconds', 'removed')]
+        for name, stats in self.stats.items():
+            lines.append('{:<16}{:>10}{:>12.4f}{:>12}'.format(name, stats['calls'], stats['seconds'],
+                                                             stats['removed']))
+        return '\n'.join(lines)
@@ -0,0 +1,172 @@
+"""Canonical forms of diagonal Sudoku puzzles and a solution cache keyed by them.
+
+Two puzzles are equivalent if one can be turned into the other by relabelling
+the digits and by a transform of the board that maps every unit (including
+both diagonals) onto a unit. The transforms used here are generated by:
+
+    - transposing the board,
+    - rotating it by 90 degrees (which swaps the two diagonals),
+    - swapping band i with band n - 1 - i (together with the matching stacks),
+    - swapping rows k and n - 1 - k inside band i and inside band n - 1 - i
+      (together with the matching columns).
+
+The canonical form of a puzzle is the smallest grid string over all these
+transforms, with the digits relabelled in order of first appearance, so
+equivalent puzzles share a canonical form and a cached solution.
+"""
+from collections import OrderedDict
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def symmetries(size=9):
+    """Return the board transforms of a size x size board
+
+    Returns
+    -------
+    tuple
+        the transforms as tuples of box indices, where transform t maps a grid
+        to the grid whose box i holds the original box t[i]; the identity is
+        the first one
+    """
+    n = int(round(size ** 0.5))
+    cells = [(r, c) for r in range(size) for c in range(size)]
+
+    def transform(f):
+        return tuple(f(r, c)[0] * size + f(r, c)[1] for r, c in cells)
+
+    def permute_lines(p):
+        return transform(lambda r, c: (p[r], p[c]))
+
+    generators = [transform(lambda r, c: (c, r)),
+                  transform(lambda r, c: (size - 1 - c, r))]
+    for band in range(n // 2):
+        p = list(range(size))
+        for k in range(n):
+            p[band * n + k], p[(n - 1 - band) * n + k] = (n - 1 - band) * n + k, band * n + k
+        generators.append(permute_lines(p))
+    for band in range((n + 1) // 2):
+        for k in range(n // 2):
+            p = list(range(size))
+            for b in {band, n - 1 - band}:
+                p[b * n + k], p[b * n + n - 1 - k] = b * n + n - 1 - k, b * n + k
+            generators.append(permute_lines(p))
+
+    identity = tuple(range(size * size))
+    group, frontier = {identity}, [identity]
+    while frontier:
+        new = []
+        for t in frontier:
+            for g in generators:
+                composed = tuple(t[i] for i in g)
+                if composed not in group:
+                    group.add(composed)
+                    new.append(composed)
+        frontier = new
+    group.discard(identity)
+    return (identity,) + tuple(sorted(group))
+
+
+def canonical_form(grid, digits='123456789'):
+    """Return the canonical form of a puzzle
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid ('.' for empty boxes)
+
+    digits(string)
+        the digit symbols of the board size
+
+    Returns
+    -------
+    tuple
+        the canonical grid string, the transform that produced it and the
+        digit relabelling (a dict from the digits of grid to canonical digits,
+        covering every digit)
+    """
+    best = None
+    for t in symmetries(int(round(len(grid) ** 0.5))):
+        relabel = {}
+        out = []
+        for i in t:
+            d = grid[i]
+            if d != '.' and d not in relabel:
+                relabel[d] = digits[len(relabel)]
+            out.append(relabel.get(d, '.'))
+        candidate = ''.join(out)
+        if best is None or candidate < best[0]:
+            best = (candidate, t, relabel)
+    canonical, t, relabel = best
+    # digits missing from the puzzle take the remaining labels in order
+    unused = iter(d for d in digits if d not in relabel.values())
+    for d in digits:
+        if d not in relabel:
+            relabel[d] = next(unused)
+    return canonical, t, relabel
+
+
+def to_canonical(grid, t, relabel):
+    """Map a grid (e.g. a solution) through a transform and relabelling """
+    return ''.join(relabel.get(grid[i], '.') for i in t)
+
+
+def from_canonical(canonical, t, relabel):
+    """Map a canonical grid back through the inverse transform and relabelling """
+    inverse = {label: d for d, label in relabel.items()}
+    grid = ['.'] * len(canonical)
+    for i, d in zip(t, canonical):
+        grid[i] = inverse.get(d, '.')
+    return ''.join(grid)
+
+
+class SolutionCache:
+    """A bounded LRU cache of solutions keyed by canonical form
+
+    Parameters
+    ----------
+    maxsize(int)
+        the number of canonical puzzles to keep
+
+    Attributes
+    ----------
+    hits, misses(int)
+        lookup counters
+    """
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._solutions = OrderedDict()
+
+    def __len__(self):
+        return len(self._solutions)
+
+    def lookup(self, grid, digits='123456789', diagonal=True):
+        """Look a puzzle up
+
+        Puzzles solved with and without the diagonal units are cached apart,
+        since the same grid can have different solutions under each rule.
+
+        Returns
+        -------
+        tuple
+            the key to pass to store(), and the solution grid of the puzzle (''
+            if it is known to have no solution) or None on a miss
+        """
+        canonical, t, relabel = canonical_form(grid, digits)
+        key = ((diagonal, canonical), t, relabel)
+        if key[0] not in self._solutions:
+            self.misses += 1
+            return key, None
+        self.hits += 1
+        self._solutions.move_to_end(key[0])
+        solved = self._solutions[key[0]]
+        return key, solved and from_canonical(solved, t, relabel)
+
+    def store(self, key, solved):
+        """Cache the solution grid ('' if there is none) of the puzzle looked up with key """
+        entry, t, relabel = key
+        self._solutions[entry] = solved and to_canonical(solved, t, relabel)
+        self._solutions.move_to_end(entry)
+        if len(self._solutions) > self.maxsize:
+            self._solutions.popitem(last=False)
@@ -0,0 +1,34 @@
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import bitboard
+import solution
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class TestBatch(unittest.TestCase):
+    diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def test_matches_single_puzzle_search(self):
+        import batch
+        grids = [self.diagonal_grid, '.' * 81, '11' + '.' * 79]
+        boards = [bitboard.grid2board(grid, solution.tables) for grid in grids]
+        expected = [bitboard.search_inplace(board[:], solution.tables) for board in boards]
+        self.assertEqual(batch.solve_batch(boards, solution.tables), expected)
+
+    def test_propagation_flags_contradictions(self):
+        import batch
+        boards = [bitboard.grid2board(grid, solution.tables) for grid in (self.diagonal_grid, '11' + '.' * 79)]
+        _, failed = batch.propagate(np.array(boards, dtype=np.uint32), solution.tables)
+        self.assertEqual(failed.tolist(), [False, True])
+
+    def test_backend(self):
+        self.assertEqual(solution.solve(self.diagonal_grid, backend='batch'), solution.solve(self.diagonal_grid))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import copy
+import unittest
+
+import benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_corpora(self):
+        for name in benchmark.CORPORA:
+            grids = benchmark.load_corpus(name)
+            self.assertTrue(grids)
+            self.assertTrue(all(len(grid) == 81 for grid in grids))
+
+    def test_measure(self):
+        metrics = benchmark.measure(benchmark.load_corpus('pathological')[0], repeat=1)
+        self.assertTrue(metrics['solved'])
+        self.assertGreater(metrics['nodes'], 1)
+        self.assertGreaterEqual(metrics['passes'], metrics['nodes'])
+        self.assertGreater(metrics['peak_bytes'], 0)
+
+    def test_compare(self):
+        puzzles = [{'solved': True, 'seconds': 0.01, 'nodes': 5, 'backtracks': 3, 'passes': 9, 'peak_bytes': 1000}]
+        baseline = {'corpora': {'hard': {'puzzles': puzzles, 'totals': benchmark.totals(puzzles)}}}
+        self.assertEqual(benchmark.compare(baseline, baseline), [])
+
+        slower = copy.deepcopy(baseline)
+        slower['corpora']['hard']['totals']['seconds'] = 0.02
+        slower['corpora']['hard']['totals']['nodes'] = 6
+        regressions = benchmark.compare(slower, baseline)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(message.startswith('hard: ') for message in regressions))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+
+import bitboard
+import solution
+
+
+class TestBitboard(unittest.TestCase):
+    diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def test_adapters_round_trip(self):
+        values = solution.grid2values(self.diagonal_grid)
+        board = bitboard.values2board(values, solution.tables)
+        self.assertEqual(board, bitboard.grid2board(self.diagonal_grid, solution.tables))
+        self.assertEqual(bitboard.board2values(board, solution.tables), values)
+
+    def test_search_solves_all_units(self):
+        board = bitboard.search(bitboard.grid2board(self.diagonal_grid, solution.tables), solution.tables)
+        self.assertTrue(bitboard.is_solved(board))
+        for unit in solution.tables.units:
+            self.assertEqual(sum(board[box] for box in unit), solution.tables.full)
+
+    def test_incremental_matches_full_passes(self):
+        board = bitboard.grid2board(self.diagonal_grid, solution.tables)
+        self.assertEqual(bitboard.search(board[:], solution.tables, incremental=False),
+                         bitboard.search(board[:], solution.tables))
+
+    def test_propagate_detects_empty_unit_digit(self):
+        board = bitboard.grid2board('.' * 81, solution.tables)
+        for box in solution.tables.units[0]:
+            board[box] &= ~1
+        self.assertFalse(bitboard.propagate(board, solution.tables, solution.tables.units[0]))
+
+    def test_search_inplace_matches_search(self):
+        board = bitboard.grid2board(self.diagonal_grid, solution.tables)
+        self.assertEqual(bitboard.search_inplace(board[:], solution.tables),
+                         bitboard.search(board[:], solution.tables))
+
+    def test_search_ordered(self):
+        board = bitboard.grid2board(self.diagonal_grid, solution.tables)
+        expected = bitboard.search_inplace(board[:], solution.tables)
+        for options in ({}, {'degree': False}, {'lcv': False}, {'restarts': 3, 'max_nodes': 1, 'seed': 0}):
+            self.assertEqual(bitboard.search_ordered(board[:], solution.tables, **options), expected)
+        self.assertFalse(bitboard.search_ordered(bitboard.grid2board('11' + '.' * 79, solution.tables),
+                                                 solution.tables, restarts=2))
+
+    def test_counters(self):
+        board = bitboard.grid2board('.' * 81, solution.tables)
+        bitboard.reset_counters()
+        bitboard.search_inplace(board, solution.tables)
+        self.assertGreater(bitboard.counters['nodes'], 1)
+        self.assertGreater(bitboard.counters['passes'], bitboard.counters['backtracks'])
+        bitboard.reset_counters()
+        self.assertEqual(set(bitboard.counters.values()), {0})
+
+    def test_undo_restores_board(self):
+        board = bitboard.grid2board('.' * 81, solution.tables)
+        before, trail = board[:], [(0, board[0])]
+        board[0] = 1
+        bitboard.propagate(board, solution.tables, [0], trail)
+        self.assertEqual(bitboard.undo(board, trail, 0), before)
+
+    def test_get_tables_matches_solution_units(self):
+        tables = bitboard.get_tables(9, True)
+        self.assertEqual((tables.boxes, tables.units, tables.peers),
+                         (solution.tables.boxes, solution.tables.units, solution.tables.peers))
+        self.assertIs(bitboard.get_tables(16), bitboard.get_tables(16))
+
+    def test_larger_boards(self):
+        for size in (16, 25):
+            tables = bitboard.get_tables(size, diagonal=False)
+            board = bitboard.search_inplace(bitboard.grid2board('.' * size * size, tables), tables)
+            for unit in tables.units:
+                self.assertEqual(sum(board[box] for box in unit), tables.full)
+
+    def test_common_peers(self):
+        common_peers = solution.tables.common_peers
+        a, b = solution.tables.index['A1'], solution.tables.index['A2']
+        expected = sorted(solution.tables.index[box] for box in set(solution.peers['A1']) & set(solution.peers['A2']))
+        self.assertEqual(list(common_peers[a, b]), expected)
+        self.assertNotIn((a, solution.tables.index['B4']), common_peers)
+        with self.assertRaises(TypeError):
+            common_peers[a, b] = ()
+
+    def test_contradiction(self):
+        grid = '11' + '.' * 79
+        self.assertFalse(bitboard.search(bitboard.grid2board(grid, solution.tables), solution.tables))
+        self.assertFalse(bitboard.search_inplace(bitboard.grid2board(grid, solution.tables), solution.tables))
+
+
+if __name__ == '__main__':
+    unittest.main()
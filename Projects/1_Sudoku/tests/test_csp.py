@@ -0,0 +1,55 @@
+import unittest
+
+import csp
+import solution
+from utils import boxes
+
+
+class TestCSP(unittest.TestCase):
+    diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+    australia = {'WA': ['NT', 'SA'], 'NT': ['SA', 'Q'], 'SA': ['Q', 'NSW', 'V'], 'Q': ['NSW'],
+                 'NSW': ['V'], 'T': []}
+
+    def test_sudoku(self):
+        expected = solution.solve(self.diagonal_grid)
+        for inference in ('forward_checking', 'mac'):
+            problem = csp.sudoku(self.diagonal_grid, boxes, solution.unitlist)
+            self.assertEqual(problem.solve(inference), expected)
+            self.assertGreater(problem.stats['nodes'], 0)
+
+    def test_solution_backend(self):
+        self.assertEqual(solution.solve(self.diagonal_grid, backend='csp'), solution.solve(self.diagonal_grid))
+        values = solution.solve(self.diagonal_grid, backend='csp', diagonal=False)
+        grid = ''.join(values[box] for box in boxes)
+        self.assertTrue(all(given in '.' + digit for given, digit in zip(self.diagonal_grid, grid)))
+        self.assertEqual(solution.count_solutions(grid, diagonal=False), 1)
+        self.assertFalse(solution.solve('11' + '.' * 79, backend='csp'))
+
+    def test_map_coloring(self):
+        for inference in ('forward_checking', 'mac', None):
+            coloring = csp.map_coloring(self.australia, ['red', 'green', 'blue']).solve(inference)
+            self.assertEqual(len(coloring), 7)
+            for a, bs in self.australia.items():
+                for b in bs:
+                    self.assertNotEqual(coloring[a], coloring[b])
+        self.assertIsNone(csp.map_coloring(self.australia, ['red', 'green']).solve())
+
+    def test_n_queens(self):
+        for n, inference in ((8, None), (8, 'mac'), (40, 'forward_checking')):
+            columns = csp.n_queens(n).solve(inference)
+            self.assertEqual(len(set(columns.values())), n)
+            self.assertEqual(len({c - r for r, c in columns.items()}), n)
+            self.assertEqual(len({c + r for r, c in columns.items()}), n)
+        self.assertIsNone(csp.n_queens(3).solve())
+
+    def test_add_constraint(self):
+        problem = csp.CSP(['x', 'y'], range(5), {'x': [1, 2, 3]})
+        problem.add_constraint('x', 'y', lambda x, y: y == 2 * x)
+        problem.add_constraint('y', 'x', lambda y, x: y > 2)
+        self.assertEqual(problem.solve(lcv=False), {'x': 2, 'y': 4})
+        with self.assertRaises(ValueError):
+            problem.solve(inference='unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+
+import bitboard
+import dlx
+import solution
+
+
+class TestDancingLinks(unittest.TestCase):
+    diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def test_exact_cover(self):
+        # Knuth's example: the only cover is rows A, D and E
+        matrix = dlx.DancingLinks(7, [('A', [2, 4, 5]), ('B', [0, 3, 6]), ('C', [1, 2, 5]),
+                                      ('D', [0, 3]), ('E', [1, 6]), ('F', [3, 4, 6])])
+        self.assertEqual([sorted(rows) for rows in matrix.solutions()], [['A', 'D', 'E']])
+
+    def test_matches_propagation_backend(self):
+        self.assertEqual(solution.solve(self.diagonal_grid, backend='dlx'), solution.solve(self.diagonal_grid))
+
+    def test_diagonals_are_covered(self):
+        board = dlx.search(bitboard.grid2board('.' * 81, solution.tables), solution.tables)
+        for unit in solution.tables.units:
+            self.assertEqual(sum(board[box] for box in unit), solution.tables.full)
+
+    def test_no_solution(self):
+        self.assertFalse(solution.solve('11' + '.' * 79, backend='dlx'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+import bitboard
+import generator
+import solution
+
+
+class TestGenerator(unittest.TestCase):
+
+    def test_generated_puzzle_is_unique(self):
+        grid, difficulty, counts = generator.generate_one(seed=1)
+        self.assertIn(difficulty, generator.DIFFICULTIES)
+        self.assertEqual(solution.count_solutions(grid), 1)
+        self.assertEqual(generator.generate_one(seed=1), (grid, difficulty, counts))
+
+    def test_rate(self):
+        solved = bitboard.board2grid(bitboard.search_inplace(
+            bitboard.grid2board('.' * 81, solution.tables), solution.tables), solution.tables)
+        difficulty, counts = generator.rate(bitboard.grid2board('.' + solved[1:], solution.tables),
+                                            solution.tables)
+        self.assertEqual(difficulty, 'easy')
+        self.assertEqual(counts['eliminate'], 1)
+        difficulty, counts = generator.rate(bitboard.grid2board('.' * 81, solution.tables), solution.tables)
+        self.assertEqual((difficulty, counts['search']), ('expert', 1))
+
+    def test_generate_fills_buckets(self):
+        puzzles = list(generator.generate({'expert': 1}, processes=1, seed=1))
+        self.assertEqual([difficulty for _, difficulty, _ in puzzles], ['expert'])
+        puzzles = list(generator.generate({'easy': 2, 'medium': 1}, processes=1, seed=1))
+        self.assertEqual(sorted(difficulty for _, difficulty, _ in puzzles), ['easy', 'easy', 'medium'])
+
+    def test_generate_one_difficulty(self):
+        for difficulty in generator.DIFFICULTIES:
+            grid, rated, _ = generator.generate_one(seed=2, difficulty=difficulty)
+            self.assertLessEqual(generator.DIFFICULTIES.index(rated), generator.DIFFICULTIES.index(difficulty))
+            self.assertEqual(solution.count_solutions(grid), 1)
+
+    def test_generate_gives_up(self):
+        # the puzzle of seed 1 aimed at hard rates medium
+        with self.assertRaises(RuntimeError):
+            list(generator.generate({'hard': 1}, processes=1, seed=1, max_misses=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
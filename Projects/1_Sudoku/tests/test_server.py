@@ -0,0 +1,65 @@
+import asyncio
+import json
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import server
+
+
+class TestServer(unittest.TestCase):
+    diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def run_requests(self, lines):
+        loop = asyncio.new_event_loop()
+        output = []
+
+        async def run():
+            reader = asyncio.StreamReader()
+            reader.feed_data(''.join(line + '\n' for line in lines).encode('utf-8'))
+            reader.feed_eof()
+            with ThreadPoolExecutor(2) as executor:
+                await server.serve(reader, output.append, executor, max_pending=2)
+
+        try:
+            loop.run_until_complete(run())
+        finally:
+            loop.close()
+        return {response['id']: response for response in map(json.loads, output)}
+
+    def test_responses(self):
+        responses = self.run_requests([
+            json.dumps({'id': 1, 'grid': self.diagonal_grid}),
+            json.dumps({'id': 2, 'grid': '11' + '.' * 79, 'backend': 'dlx'}),
+            json.dumps({'id': 3, 'grid': '123'}),
+            '',
+            'not json',
+        ])
+        self.assertEqual(sorted(responses, key=str), [1, 2, 3, None])
+        self.assertEqual(responses[1]['solution'][:9], '267945381')
+        self.assertIsNone(responses[2]['solution'])
+        self.assertIn('ValueError', responses[3]['error'])
+        self.assertIn('invalid request', responses[None]['error'])
+        self.assertTrue(all(response['latency_ms'] >= 0 for response in responses.values()))
+
+    def test_unexpected_error(self):
+        def broken(board, grid_tables):
+            raise RuntimeError('boom')
+
+        with mock.patch.dict(server.solution.backends, {'broken': broken}):
+            responses = self.run_requests([
+                json.dumps({'id': 1, 'grid': self.diagonal_grid, 'backend': 'broken'}),
+                json.dumps({'id': 2, 'grid': self.diagonal_grid}),
+            ])
+        self.assertEqual(responses[1]['error'], 'RuntimeError: boom')
+        self.assertNotIn('solution', responses[1])
+        self.assertEqual(responses[2]['solution'][:9], '267945381')
+
+    def test_executor_error(self):
+        with mock.patch.object(server, 'solve_request', side_effect=RuntimeError('worker died')):
+            responses = self.run_requests([json.dumps({'id': 7, 'grid': self.diagonal_grid})])
+        self.assertEqual(responses[7]['error'], 'RuntimeError: worker died')
+
+
+if __name__ == '__main__':
+    unittest.main()
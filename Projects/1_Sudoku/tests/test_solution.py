@@ -3,8 +3,10 @@ tests does not guarantee that your solution is correct. The Project Asssistant t
 many additional test cases that you must also pass to complete the project. You should write your
 own additional test cases to cover any failed tests shown in the Project Assistant feedback.
 """
+import io
 import unittest
 import solution
+import utils
 
 
 class TestNakedTwins(unittest.TestCase):
@@ -99,5 +101,90 @@ class TestDiagonalSudoku(unittest.TestCase):
     def test_solve(self):
         self.assertEqual(solution.solve(self.diagonal_grid), self.solved_diag_sudoku)
 
+    def test_search_orderings(self):
+        values = solution.grid2values(self.diagonal_grid)
+        for options in ({'degree': True}, {'lcv': True}, {'degree': True, 'lcv': True, 'restarts': 2, 'seed': 1}):
+            self.assertEqual(solution.search(dict(values), **options), self.solved_diag_sudoku)
+        self.assertEqual(solution.solve(self.diagonal_grid, backend='ordered'), self.solved_diag_sudoku)
+
+
+class TestCountSolutions(unittest.TestCase):
+    diagonal_grid = TestDiagonalSudoku.diagonal_grid
+
+    def test_unique(self):
+        self.assertEqual(solution.count_solutions(self.diagonal_grid), 1)
+
+    def test_limit(self):
+        self.assertEqual(solution.count_solutions('.' * 81), 2)
+        self.assertEqual(solution.count_solutions('.' * 81, limit=5), 5)
+
+    def test_without_diagonals(self):
+        self.assertEqual(solution.count_solutions(self.diagonal_grid, diagonal=False), 2)
+
+    def test_no_solution(self):
+        self.assertEqual(solution.count_solutions('11' + '.' * 79), 0)
+
+
+class TestHistory(unittest.TestCase):
+    diagonal_grid = TestDiagonalSudoku.diagonal_grid
+
+    def tearDown(self):
+        utils.record_history(False)
+
+    def test_off_by_default(self):
+        solution.solve(self.diagonal_grid)
+        self.assertEqual(utils.history, [])
+
+    def test_replay_reaches_solution(self):
+        utils.record_history()
+        result = solution.solve(self.diagonal_grid)
+        values = solution.grid2values(self.diagonal_grid)
+        for box, value in utils.reconstruct(result, utils.history):
+            values[box] = value
+        self.assertEqual(values, result)
+
+    def test_log_follows_search(self):
+        # a puzzle that needs search with backtracking
+        grid = '..9.7....3.2..8......6.3.......47.58......3.2............4............7.1.5.....6'
+        utils.record_history()
+        result = solution.solve(grid)
+        values = solution.grid2values(grid)
+        for box, old, new in utils.history:
+            self.assertEqual(values[box], old)
+            values[box] = new
+        self.assertEqual(values, result)
+        # candidates are eliminated, and assignments are undone when a branch fails
+        self.assertTrue(any(len(new) > 1 for _, _, new in utils.history))
+        self.assertTrue(any(len(old) == 1 < len(new) for _, old, new in utils.history))
+
+
+class TestSolveMany(unittest.TestCase):
+    diagonal_grid = TestDiagonalSudoku.diagonal_grid
+    solved_grid = ''.join(TestDiagonalSudoku.solved_diag_sudoku[box] for box in solution.boxes)
+
+    def check(self, processes):
+        infile = io.StringIO('\n'.join([self.diagonal_grid, '11' + '.' * 79, '', self.diagonal_grid]))
+        outfile = io.StringIO()
+        count, _ = solution.solve_many(infile, outfile, processes=processes, chunksize=1, window=2)
+        self.assertEqual(count, 3)
+        self.assertEqual(outfile.getvalue().split('\n'), [self.solved_grid, '', self.solved_grid, ''])
+
+    def test_in_process(self):
+        self.check(processes=1)
+
+    def test_pool_keeps_input_order(self):
+        self.check(processes=2)
+
+    def test_malformed_grids(self):
+        grids = [self.diagonal_grid, '.' * 80, 'x' + '.' * 80, self.diagonal_grid]
+        for backend in ('propagation', 'batch'):
+            for processes in (1, 2):
+                outfile = io.StringIO()
+                count, _ = solution.solve_many(io.StringIO('\n'.join(grids)), outfile, processes=processes,
+                                               backend=backend)
+                self.assertEqual(count, 4)
+                self.assertEqual(outfile.getvalue().split('\n'), [self.solved_grid, '', '', self.solved_grid, ''])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+import bitboard
+import solution
+import strategies
+
+
+class TestStrategies(unittest.TestCase):
+    # puzzles that need search with eliminate, only choice and naked twins alone
+    grids = ['..25.1.....3...4..5....83..13..............7...7..69................7...751..2...',
+             '..6...............7...859...37.28........37......5............3.7.4.9.......3.5..']
+
+    def test_strategies_keep_the_solution(self):
+        tables = solution.tables
+        for grid in self.grids:
+            solved = bitboard.search_inplace(bitboard.grid2board(grid, tables), tables)
+            start = bitboard.propagate(bitboard.grid2board(grid, tables), tables)
+            for name, strategy in strategies.registry.items():
+                board = strategy(start[:], tables)
+                self.assertTrue(all(mask & bit for mask, bit in zip(board, solved)), name)
+
+    def test_pipeline_counters(self):
+        pipeline = strategies.Pipeline(list(strategies.registry))
+        for grid in self.grids:
+            self.assertEqual(solution.solve(grid, pipeline=pipeline), solution.solve(grid))
+        self.assertEqual(list(pipeline.stats), list(strategies.registry))
+        self.assertGreater(pipeline.stats['eliminate']['removed'], 0)
+        self.assertTrue(all(stats['calls'] > 0 for stats in pipeline.stats.values()))
+        self.assertEqual(len(pipeline.report().splitlines()), len(strategies.registry) + 1)
+
+    def test_pipeline_without_eliminate(self):
+        solved = '267945381853716249491823576576438192384192657129657438642379815935281764718564923'
+        grid = ''.join('.' if i * 7 % 81 < 30 else digit for i, digit in enumerate(solved))
+        for names in (['only_choice'], ['hidden_pairs'], ['naked_twins', 'x_wing']):
+            self.assertEqual(solution.solve(grid, pipeline=strategies.Pipeline(names)),
+                             solution.solve(grid), names)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            strategies.Pipeline(['eliminate', 'swordfish'])
+
+
+if __name__ == '__main__':
+    unittest.main()
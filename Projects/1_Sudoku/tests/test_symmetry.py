@@ -0,0 +1,53 @@
+import unittest
+
+import solution
+import symmetry
+
+
+class TestSymmetry(unittest.TestCase):
+    diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def transformed(self):
+        """The example puzzle transposed, rotated by 180 degrees and with digits 1 and 2 swapped """
+        rows = [self.diagonal_grid[i:i + 9] for i in range(0, 81, 9)]
+        grid = ''.join(''.join(row[c] for row in rows) for c in range(9))[::-1]
+        return grid.translate(str.maketrans('12', '21'))
+
+    def test_transforms_preserve_units(self):
+        units = set(frozenset(unit) for unit in solution.tables.units)
+        for t in symmetry.symmetries(9):
+            moved = {t[i]: i for i in range(81)}
+            for unit in units:
+                self.assertIn(frozenset(moved[box] for box in unit), units)
+
+    def test_equivalent_puzzles_share_canonical_form(self):
+        self.assertEqual(symmetry.canonical_form(self.diagonal_grid)[0],
+                         symmetry.canonical_form(self.transformed())[0])
+
+    def test_round_trip(self):
+        _, t, relabel = symmetry.canonical_form(self.transformed())
+        self.assertEqual(symmetry.from_canonical(symmetry.to_canonical(self.diagonal_grid, t, relabel),
+                                                 t, relabel), self.diagonal_grid)
+
+    def test_cache_hit_maps_solution_back(self):
+        cache = symmetry.SolutionCache(maxsize=1)
+        solution.solve(self.diagonal_grid, cache=cache)
+        self.assertEqual(solution.solve(self.transformed(), cache=cache), solution.solve(self.transformed()))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertFalse(solution.solve('11' + '.' * 79, cache=cache))
+        self.assertFalse(solution.solve('11' + '.' * 79, cache=cache))
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (2, 2, 1))
+
+    def test_cache_separates_diagonal_rules(self):
+        cache = symmetry.SolutionCache()
+        plain = solution.solve('.' * 81, diagonal=False, cache=cache)
+        diagonal = solution.solve('.' * 81, diagonal=True, cache=cache)
+        self.assertEqual(diagonal, solution.solve('.' * 81))
+        self.assertEqual(len({diagonal[box] for box in solution.diagonal_units[0]}), 9)
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (0, 2, 2))
+        self.assertEqual(solution.solve('.' * 81, diagonal=False, cache=cache), plain)
+        self.assertEqual(cache.hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
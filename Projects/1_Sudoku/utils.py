@@ -1,11 +1,12 @@
 
-from collections import defaultdict
+from collections import defaultdict, deque
 
 
 rows = 'ABCDEFGHI'
 cols = '123456789'
 boxes = [r + c for r in rows for c in cols]
-history = {}  # history must be declared here so that it exists in the assign_values scope
+history = []  # history must be declared here so that it exists in the assign_values scope
+recording = {'enabled': False}  # assign_value only appends to history while enabled
 
 
 def extract_units(unitlist, boxes):
@@ -66,10 +67,26 @@ def extract_peers(units, boxes):
     return peers
 
 
+def record_history(enabled=True):
+    """Turn the recording of assignments for the visualization on or off
+
+    Recording is off by default so that batch solves don't pay for it. Turning
+    it on also clears any previously recorded assignments.
+
+    Parameters
+    ----------
+    enabled(bool)
+        whether assign_value should append to the history log
+    """
+    recording['enabled'] = enabled
+    del history[:]
+
+
 def assign_value(values, box, value):
     """You must use this function to update your values dictionary if you want to
-    try using the provided visualization tool. This function records each assignment
-    (in order) for later reconstruction.
+    try using the provided visualization tool. While recording is enabled (see
+    record_history) this function appends each assignment (in order) to the
+    history log as a (box, old, new) entry for later reconstruction.
 
     Parameters
     ----------
@@ -85,10 +102,9 @@ def assign_value(values, box, value):
     if values[box] == value:
         return values
 
-    prev = values2grid(values)
+    if recording['enabled']:
+        history.append((box, values[box], value))
     values[box] = value
-    if len(value) == 1:
-        history[values2grid(values)] = (prev, (box, value))
     return values
 
 def cross(A, B):
@@ -96,6 +112,41 @@ def cross(A, B):
     return [x+y for x in A for y in B]
 
 
+def make_layout(size=9, diagonal=True):
+    """Build the boxes and units of a size x size sudoku board
+
+    Rows are labelled with letters and columns with numbers, so the boxes of a
+    9x9 board are the usual 'A1' ... 'I9' and those of a 16x16 board run from
+    'A1' to 'P16'.
+
+    Parameters
+    ----------
+    size(int)
+        the number of boxes per row; must be a perfect square (9, 16, 25, ...)
+
+    diagonal(bool)
+        whether the two main diagonals are units
+
+    Returns
+    -------
+    tuple
+        the list of boxes in row-major order and the list of units
+    """
+    n = int(round(size ** 0.5))
+    if n * n != size or size > 26:
+        raise ValueError('Invalid board size: {}'.format(size))
+    size_rows = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'[:size]
+    size_cols = [str(c) for c in range(1, size + 1)]
+    unitlist = [cross(r, size_cols) for r in size_rows]
+    unitlist += [cross(size_rows, [c]) for c in size_cols]
+    unitlist += [cross(size_rows[i:i + n], size_cols[j:j + n])
+                 for i in range(0, size, n) for j in range(0, size, n)]
+    if diagonal:
+        unitlist += [[size_rows[i] + size_cols[i] for i in range(size)],
+                     [size_rows[i] + size_cols[size - 1 - i] for i in range(size)]]
+    return cross(size_rows, size_cols), unitlist
+
+
 def values2grid(values):
     """Convert the dictionary board representation to as string
 
@@ -168,10 +219,8 @@ def reconstruct(values, history):
     values(dict)
         a dictionary of the form {'box_name': '123456789', ...}
 
-    history(dict)
-        a dictionary of the form {key: (key, (box, value))} encoding a linked
-        list where each element points to the parent and identifies the value
-        assignment that connects from the parent to the current state
+    history(list)
+        a log of (box, old, new) entries in the order assign_value made them
 
     Returns
     -------
@@ -179,9 +228,45 @@ def reconstruct(values, history):
         a list of (box, value) assignments that can be applied in order to the
         starting Sudoku puzzle to reach the solution
     """
+    final = {}
     path = []
-    prev = values2grid(values)
-    while prev in history:
-        prev, step = history[prev]
-        path.append(step)
-    return path[::-1]
+    for box, old, new in history:
+        if len(new) == 1:
+            final[box] = len(path)
+            path.append((box, new))
+    # only keep the last assignment to each box, and only if it made it into values
+    return [(box, value) for i, (box, value) in enumerate(path)
+            if final[box] == i and values[box] == value]
+
+
+def imap_bounded(pool, func, iterable, window):
+    """Like pool.imap, but with at most window tasks submitted and not yet consumed
+
+    Pool.imap reads its whole input up front, which doesn't keep memory flat on
+    very large inputs. The iterable is only advanced as results are consumed.
+
+    Parameters
+    ----------
+    pool(multiprocessing.Pool)
+        the worker pool
+
+    func(callable)
+        a picklable function of one item
+
+    iterable(iterable)
+        the items to map func over
+
+    window(int)
+        the maximum number of tasks in flight
+
+    Yields
+    ------
+    the result of func on each item, in input order
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(pool.apply_async(func, (item,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
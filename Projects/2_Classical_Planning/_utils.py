@@ -109,11 +109,15 @@ def conjunctive_sentence(pos_list, neg_list):
 
 def encode_state(fs, fluent_map):
     """ Convert a FluentState (list of positive fluents and negative fluents) into
-    an ordered sequence of True/False values.
+    an integer bitset.
 
     It is sometimes convenient to encode a problem in terms of the specific
     fluents that are True or False in a state, but other times it is easier (or faster)
-    to perform computations on an an array of booleans.
+    to perform computations on an integer with one bit per fluent, set when the
+    fluent is True (testing or applying an action is then a few bit operations).
+    The first fluent of fluent_map is the most significant bit, so integer states
+    compare like the tuples of True/False values (search breaks ties between
+    nodes by comparing their states).
 
     Parameters
     ----------
@@ -125,13 +129,27 @@ def encode_state(fs, fluent_map):
     
     Returns
     -------
-    tuple of True/False elements corresponding to the fluents in fluent_map
+    int with bit len(fluent_map) - 1 - i set for each True fluent fluent_map[i]
+    """
+    return encode_fluents(fs.pos, fluent_map)
+
+
+def encode_fluents(fluents, fluent_map):
+    """ Return the integer bitset of a collection of fluents, with bit
+    len(fluent_map) - 1 - i set when fluent_map[i] is in the collection (fluents
+    missing from fluent_map are ignored)
     """
-    return tuple([f in fs.pos for f in fluent_map])
+    fluents = set(fluents)
+    mask = 0
+    for f in fluent_map:
+        mask <<= 1
+        if f in fluents:
+            mask |= 1
+    return mask
 
 
 def decode_state(state, fluent_map):
-    """ Convert an ordered list of True/False values into a FluentState
+    """ Convert an integer bitset or an ordered list of True/False values into a FluentState
     (list of positive fluents and negative fluents)
 
     It is sometimes convenient to encode a problem in terms of the specific
@@ -141,7 +159,8 @@ def decode_state(state, fluent_map):
     Parameters
     ----------
     state:
-        A state represented as an ordered sequence of True/False values
+        A state represented as an integer bitset (or as an ordered sequence of
+        True/False values)
 
     fluent_map:
         An ordered sequence of fluents
@@ -152,6 +171,9 @@ def decode_state(state, fluent_map):
     entries from the input state in the pos_list, and containing the fluents from
     fluent_map corresponding to False entries in the neg_list
     """
+    if isinstance(state, int):
+        top = len(fluent_map) - 1
+        state = [bool(state >> (top - idx) & 1) for idx in range(len(fluent_map))]
     fs = FluentState(set(), set())
     for idx, elem in enumerate(state):
         if elem:
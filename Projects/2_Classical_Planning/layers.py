@@ -1,8 +1,9 @@
 
 from copy import deepcopy
 from functools import lru_cache
-from itertools import combinations
-from collections import defaultdict, MutableSet
+from itertools import chain
+from collections import defaultdict
+from collections.abc import Mapping, MutableSet
 
 from aimacode.planning import Action
 from aimacode.utils import expr, Expr
@@ -79,20 +80,307 @@ class ActionNode(object):
             and self.expr == other.expr)
 
 
+def _bits(mask):
+    """ Return the single-bit masks of the set bits of mask """
+    bits = []
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        bits.append(bit)
+    return bits
+
+
+class NodeIndex(object):
+    """ Assign a distinct bit to each literal and action of a planning graph, so
+    that layers, edges and mutexes can be stored as integer bitsets
+
+    A literal and its negation are always indexed together, so that the bit of
+    the negation of every indexed literal is known.
+
+    Attributes
+    ----------
+    bits : dict
+        Mapping from each item (literal or action) to its bit (a power of two)
+
+    items : list
+        The indexed items; the bit of items[i] is 1 << i
+
+    negation : dict
+        Mapping from the bit of each literal to the bit of its negation
+    """
+    def __init__(self, items=()):
+        self.bits = {}
+        self.items = []
+        self.negation = {}
+        for item in items:
+            self.add(item)
+
+    def _append(self, item):
+        bit = 1 << len(self.items)
+        self.bits[item] = bit
+        self.items.append(item)
+        return bit
+
+    def add(self, item):
+        """ Return the bit of item, indexing it first if it is new """
+        bit = self.bits.get(item)
+        if bit is None:
+            bit = self._append(item)
+            if isinstance(item, Expr):
+                negation = self._append(~item)
+                self.negation[bit] = negation
+                self.negation[negation] = bit
+        return bit
+
+    def mask(self, items):
+        """ Return the bitset of a collection of items """
+        mask = 0
+        for item in items:
+            mask |= self.add(item)
+        return mask
+
+    def decode(self, mask):
+        """ Return the items of a bitset """
+        return [self.items[bit.bit_length() - 1] for bit in _bits(mask)]
+
+    def negate(self, mask):
+        """ Return the bitset of the negations of the literals of a bitset """
+        negation = self.negation
+        negated = 0
+        for bit in _bits(mask):
+            negated |= negation[bit]
+        return negated
+
+
+class EdgeMap(Mapping):
+    """ Mapping from each item of a layer to the set of items it is connected to
+    in an adjacent layer, stored as one bitset per item
+
+    Looking up an item that has no edges returns an empty set. The sets are
+    decoded on each lookup, so edges must be added with add() or link() rather
+    than by updating the returned set.
+    """
+    def __init__(self, index, masks=None):
+        self.index = index
+        self._masks = dict(masks or {})
+
+    def __getitem__(self, item):
+        return set(self.index.decode(self.mask(item)))
+
+    def __contains__(self, item):
+        return self.index.bits.get(item) in self._masks
+
+    def __iter__(self):
+        items = self.index.items
+        return (items[bit.bit_length() - 1] for bit in self._masks)
+
+    def __len__(self):
+        return len(self._masks)
+
+    def __eq__(self, other):
+        if isinstance(other, EdgeMap) and other.index is self.index:
+            return self._masks == other._masks
+        return super().__eq__(other)
+
+    def copy(self, index=None):
+        """ Return a copy of the edges, re-encoded if index differs from self.index """
+        if index is None or index is self.index:
+            return EdgeMap(self.index, self._masks)
+        edges = EdgeMap(index)
+        for item in self:
+            edges.add(item, self[item])
+        return edges
+
+    def mask(self, item):
+        """ Return the bitset of the items connected to item """
+        bit = self.index.bits.get(item)
+        return self._masks.get(bit, 0) if bit is not None else 0
+
+    def add(self, item, items):
+        """ Connect item to each of a collection of items """
+        self.link(self.index.add(item), self.index.mask(items))
+
+    def link(self, sources, targets):
+        """ Connect every item of the bitset sources to every item of the bitset targets """
+        masks = self._masks
+        for bit in _bits(sources):
+            masks[bit] = masks.get(bit, 0) | targets
+
+
+class ActionTable(object):
+    """ The preconditions and effects of a collection of actions as bitsets, with
+    the mutexes between them that do not depend on the state
+
+    Inconsistent effects and interference only depend on the preconditions and
+    effects of the two actions, so they are found once here instead of for
+    every pair of actions in every layer of every planning graph; action layers
+    only add the competing needs and serialization mutexes.
+
+    Parameters
+    ----------
+    index : NodeIndex
+        The bit assigned to each literal and action
+
+    actions : iterable
+        (action, bit, preconditions bitset, effects bitset) tuples
+
+    static_mutex : callable
+        Predicate called once on every pair of actions to find the static
+        mutexes (see BaseActionLayer.static_mutex())
+
+    Attributes
+    ----------
+    actions : list
+        The (action, bit, preconditions, effects) tuples
+
+    real : int
+        The bitset of the actions that are not no-op actions
+
+    mutexes : dict
+        Mapping from the bit of each action to the bitset of the actions that
+        are mutex to it by inconsistent effects or interference
+    """
+    def __init__(self, index, actions, static_mutex):
+        self.index = index
+        self.actions = list(actions)
+        self.real = 0
+        for action, bit, preconditions, effects in self.actions:
+            if not action.no_op:
+                self.real |= bit
+        # the number of preconditions and the effects of each real action, the
+        # positions of the real actions needing each literal, and the effects of
+        # the real actions without preconditions (used by level_costs())
+        self._counters, self._effects, self._needed_by = [], [], defaultdict(list)
+        self._unconditional = 0
+        for action, bit, preconditions, effects in self.actions:
+            if action.no_op:
+                continue
+            if not preconditions:
+                self._unconditional |= effects
+                continue
+            for literal in _bits(preconditions):
+                self._needed_by[literal].append(len(self._counters))
+            self._counters.append(bin(preconditions).count('1'))
+            self._effects.append(effects)
+        self._needed_by = dict(self._needed_by)
+        self.mutexes = {}
+        for i, (actionA, bitA, _, _) in enumerate(self.actions):
+            for actionB, bitB, _, _ in self.actions[i + 1:]:
+                if static_mutex(actionA, actionB):
+                    self.mutexes[bitA] = self.mutexes.get(bitA, 0) | bitB
+                    self.mutexes[bitB] = self.mutexes.get(bitB, 0) | bitA
+
+    def level_costs(self, literals, goals):
+        """ Return the level cost of each goal in the planning graph rooted at a
+        layer of literals, ignoring mutexes
+
+        The level cost of a literal is the first literal layer where it appears,
+        as read by PlanningGraph.h_levelsum() and h_maxlevel(), but the layers are
+        not built: each action counts its preconditions not reached yet, and the
+        literals reached at a level decrement the counters of the actions needing
+        them, so an action is applicable at the level where its counter reaches
+        zero and its effects are reached at the next one. Every literal and every
+        precondition is visited at most once, and the search stops as soon as all
+        the goals are reached.
+
+        Parameters
+        ----------
+        literals : int
+            The bitset of the literals in the first layer
+
+        goals : iterable
+            The bits of the goal literals
+
+        Returns
+        -------
+        dict
+            Mapping from the bit of each goal to its level cost (unreachable goals
+            are left out)
+        """
+        counters = list(self._counters)
+        needed_by, effects = self._needed_by, self._effects
+        pending = 0
+        for goal in goals:
+            pending |= goal
+        costs = {}
+        reached = frontier = literals
+        level = 0
+        while True:
+            for goal in _bits(pending & reached):
+                costs[goal] = level
+            pending &= ~reached
+            if not pending:
+                return costs
+            new = self._unconditional if not level else 0
+            for literal in _bits(frontier):
+                for i in needed_by.get(literal, ()):
+                    counters[i] -= 1
+                    if not counters[i]:
+                        new |= effects[i]
+            frontier = new & ~reached
+            if not frontier:
+                return costs
+            reached |= frontier
+            level += 1
+
+
+def make_action_table(literals, actions, layer_class):
+    """ Compile the actions of a planning problem, and a no-op action persisting
+    each literal and its negation, into an ActionTable over a new NodeIndex
+
+    Parameters
+    ----------
+    literals : iterable
+        The fluents of the problem (e.g., problem.state_map)
+
+    actions : iterable
+        The aimacode.planning.Action objects of the problem
+
+    layer_class : type
+        The BaseActionLayer subclass whose mutex tests find the static mutexes
+        (e.g., my_planning_graph.ActionLayer)
+
+    Returns
+    -------
+    ActionTable
+        The table of the action nodes, no-op actions first
+    """
+    literals = list(literals)
+    no_ops = [make_node(n, no_op=True) for n in chain(*(makeNoOp(s) for s in literals))]
+    nodes = no_ops + [make_node(a) for a in actions]
+    index = NodeIndex(chain(literals, nodes))
+    layer = layer_class(nodes, index=index)
+    for node in nodes:
+        layer.add_inbound_edges(node, node.preconditions)
+        layer.add_outbound_edges(node, node.effects)
+    return ActionTable(index, [(node, index.bits[node], index.mask(node.preconditions), index.mask(node.effects))
+                               for node in nodes], layer.static_mutex)
+
+
 class BaseLayer(MutableSet):
     """ Base class for ActionLayer and LiteralLayer classes for planning graphs
     that stores actions or literals as a mutable set (which enables terse,
     efficient membership testing and expansion)
 
+    Each layer shares a NodeIndex with the layers it is connected to, and the
+    items of the layer, their edges and their mutexes are stored as bitsets over
+    that index.
+
     Attributes
     ----------
-    parents : dict
+    index : NodeIndex
+        The bit assigned to each item (literal or action) of the planning graph
+
+    bits : int
+        The bitset of the items in the layer
+
+    parents : EdgeMap
         Mapping from each item (action or literal) in the current layer to the
         symbolic node(s) in parent layer of the planning graph. E.g.,
         parents[actionA] is a set containing the symbolic literals (positive AND
         negative) that are preconditions of the action.
 
-    children : dict
+    children : EdgeMap
         Mapping from each item (action or literal) in the current layer to the
         symbolic node(s) in the child layer of the planning graph. E.g.,
         children[actionA] is a set containing the symbolic literals (positive AND
@@ -106,16 +394,16 @@ class BaseLayer(MutableSet):
         as parent, and literal layers always have an action layer as parent.
     
     _mutexes : dict
-        Mapping from each item (action or literal) to a set containing all items
-        that are mutex to the key. E.g., _mutexes[literaA] is a set of literals
-        that are mutex to literalA in this level of the planning graph
+        Mapping from the bit of each item (action or literal) to the bitset of
+        the items that are mutex to it in this level of the planning graph
+        (items without mutexes have no entry)
 
     _ignore_mutexes : bool
         If _ignore_mutexes is True then _dynamic_ mutexes will be ignored (static
         mutexes are *always* enforced). For example, a literal X is always mutex
         with ~X, but "competing needs" or "inconsistent support" can be skipped
     """
-    def __init__(self, items=[], parent_layer=None, ignore_mutexes=False):
+    def __init__(self, items=[], parent_layer=None, ignore_mutexes=False, index=None):
         """
         Parameters
         ----------
@@ -127,97 +415,180 @@ class BaseLayer(MutableSet):
 
         ignore_mutexes : bool
             See _ignore_mutexes attribute
+
+        index : NodeIndex
+            See index attribute (by default the index of items if it is a layer,
+            else the index of parent_layer, else a new index)
         """
         super().__init__()
-        self.__store = set(iter(items))
-        self.parents = defaultdict(set)
-        self.children = defaultdict(set)
-        self._mutexes = defaultdict(set)
+        if index is None:
+            if isinstance(items, BaseLayer):
+                index = items.index
+            elif parent_layer is not None:
+                index = parent_layer.index
+            else:
+                index = NodeIndex()
+        self.index = index
+        if isinstance(items, BaseLayer) and items.index is index:
+            self.bits = items.bits
+        else:
+            self.bits = index.mask(items)
+        self.parents = EdgeMap(index)
+        self.children = EdgeMap(index)
+        self._mutexes = {}
         self.parent_layer = parent_layer
         self._ignore_mutexes = ignore_mutexes
 
     def __contains__(self, item):
-        return item in self.__store
+        bit = self.index.bits.get(item)
+        return bit is not None and bool(self.bits & bit)
 
     def __iter__(self):
-        return iter(self.__store)
+        return iter(self.index.decode(self.bits))
 
     def __len__(self):
-        return len(self.__store)
+        return bin(self.bits).count('1')
 
     def __eq__(self, other):
-        return (len(self) == len(other) and
-            len(self._mutexes) == len(other._mutexes) and
-            0 == len(self ^ other) and self._mutexes == other._mutexes)
+        if other.index is self.index:
+            return self.bits == other.bits and self._mutexes == other._mutexes
+        return (set(self) == set(other) and
+            self._mutex_pairs() == other._mutex_pairs())
+
+    def __ior__(self, items):
+        self.bits |= self.index.mask(items)
+        return self
+
+    def _mutex_pairs(self):
+        return {(item, other) for item in self for other in self.index.decode(self.mutexes_of(self.index.bits[item]))}
 
     def add(self, item):
-        self.__store.add(item)
+        self.bits |= self.index.add(item)
 
     def discard(self, item):
-        try:
-            self.__store.discard(item)
-        except ValueError:
-            pass
+        bit = self.index.bits.get(item)
+        if bit is not None:
+            self.bits &= ~bit
 
     def set_mutex(self, itemA, itemB):
-        self._mutexes[itemA].add(itemB)
-        self._mutexes[itemB].add(itemA)
+        bitA, bitB = self.index.add(itemA), self.index.add(itemB)
+        self._mutexes[bitA] = self._mutexes.get(bitA, 0) | bitB
+        self._mutexes[bitB] = self._mutexes.get(bitB, 0) | bitA
 
     def is_mutex(self, itemA, itemB):
-        return itemA in self._mutexes.get(itemB, [])
+        bitA, bitB = self.index.bits.get(itemA), self.index.bits.get(itemB)
+        return bitA is not None and bitB is not None and bool(self._mutexes.get(bitB, 0) & bitA)
+
+    def mutexes_of(self, mask):
+        """ Return the bitset of the items that are mutex to some item of the bitset mask """
+        mutexes = self._mutexes
+        result = 0
+        for bit in _bits(mask):
+            result |= mutexes.get(bit, 0)
+        return result
+
+    def common_mutexes(self, mask):
+        """ Return the bitset of the items that are mutex to every item of the bitset
+        mask (-1, i.e., every item, for an empty mask)
+        """
+        mutexes = self._mutexes
+        result = -1
+        for bit in _bits(mask):
+            result &= mutexes.get(bit, 0)
+        return result
 
 
 class BaseActionLayer(BaseLayer):
-    def __init__(self, actions=[], parent_layer=None, serialize=True, ignore_mutexes=False):
-        super().__init__(actions, parent_layer, ignore_mutexes)
+    def __init__(self, actions=[], parent_layer=None, serialize=True, ignore_mutexes=False, index=None,
+                 action_table=None):
+        """
+        Parameters
+        ----------
+        action_table : ActionTable
+            The static mutexes of the actions that can be added to the layer
+            (by default those of actions if it is an action layer); without it,
+            update_mutexes() finds them from the edges of the layer
+        """
+        super().__init__(actions, parent_layer, ignore_mutexes, index)
         self._serialize=serialize
+        self._action_table = action_table
         if isinstance(actions, BaseActionLayer):
-            self.parents.update({k: set(v) for k, v in actions.parents.items()})
-            self.children.update({k: set(v) for k, v in actions.children.items()})
+            self.parents = actions.parents.copy(self.index)
+            self.children = actions.children.copy(self.index)
+            if action_table is None and actions.index is self.index:
+                self._action_table = actions._action_table
+
+    def static_mutex(self, actionA, actionB):
+        """ Return True if two actions are mutex in every layer, by inconsistent
+        effects or interference (used to build the action table)
+        """
+        return self._inconsistent_effects(actionA, actionB) or self._interference(actionA, actionB)
 
     def update_mutexes(self):
-        for actionA, actionB in combinations(iter(self), 2):
-            if self._serialize and actionA.no_op == actionB.no_op == False:
-                self.set_mutex(actionA, actionB)
-            elif (self._inconsistent_effects(actionA, actionB)
-                    or self._interference(actionA, actionB)):
-                self.set_mutex(actionA, actionB)
-            elif self._ignore_mutexes:
-                continue
-            elif self._competing_needs(actionA, actionB):
-                self.set_mutex(actionA, actionB)
+        """ Set the mutexes of every pair of actions in the layer
+
+        The static mutexes (_inconsistent_effects() and _interference()) are read
+        from the action table, every pair of real (not no-op) actions is mutex in a
+        serial planning graph, and, unless mutexes are ignored, the other pairs are
+        tested with _competing_needs().
+        """
+        table = self._action_table
+        if table is None:
+            table = ActionTable(self.index, [
+                (action, bit, self.parents.mask(action), self.children.mask(action))
+                for action, bit in zip(self, _bits(self.bits))], self.static_mutex)
+        serial = table.real & self.bits if self._serialize else 0
+        static = table.mutexes
+        actions, bits = list(self), _bits(self.bits)
+        for i, (actionA, bitA) in enumerate(zip(actions, bits)):
+            row = static.get(bitA, 0)
+            if bitA & serial:
+                row |= serial
+            row &= self.bits & ~bitA
+            if not self._ignore_mutexes:
+                for actionB, bitB in zip(actions[i + 1:], bits[i + 1:]):
+                    if not row & bitB and self._competing_needs(actionA, actionB):
+                        row |= bitB
+                        self._mutexes[bitB] = self._mutexes.get(bitB, 0) | bitA
+            if row:
+                self._mutexes[bitA] = self._mutexes.get(bitA, 0) | row
 
     def add_inbound_edges(self, action, literals):
         # inbound action edges are many-to-one
-        self.parents[action] |= set(literals)
+        self.parents.add(action, literals)
 
     def add_outbound_edges(self, action, literals):
         # outbound action edges are one-to-many
-        self.children[action] |= set(literals)
+        self.children.add(action, literals)
 
 
 class BaseLiteralLayer(BaseLayer):
-    def __init__(self, literals=[], parent_layer=None, ignore_mutexes=False):
-        super().__init__(literals, parent_layer, ignore_mutexes)
+    def __init__(self, literals=[], parent_layer=None, ignore_mutexes=False, index=None):
+        super().__init__(literals, parent_layer, ignore_mutexes, index)
         if isinstance(literals, BaseLiteralLayer):
-            self.parents.update({k: set(v) for k, v in literals.parents.items()})
-            self.children.update({k: set(v) for k, v in literals.children.items()})
+            self.parents = literals.parents.copy(self.index)
+            self.children = literals.children.copy(self.index)
 
     def update_mutexes(self):
-        for literalA, literalB in combinations(iter(self), 2):
-            if self._negation(literalA, literalB):
-                self.set_mutex(literalA, literalB)
-            elif self._ignore_mutexes:
-                continue
-            elif len(self.parent_layer) and self._inconsistent_support(literalA, literalB):
-                self.set_mutex(literalA, literalB)
+        """ Set the mutexes of every pair of literals in the layer that are negations
+        of each other or, unless mutexes are ignored, that have inconsistent support
+        """
+        support = not self._ignore_mutexes and len(self.parent_layer)
+        literals, bits = list(self), _bits(self.bits)
+        for i, (literalA, bitA) in enumerate(zip(literals, bits)):
+            row = 0
+            for literalB, bitB in zip(literals[i + 1:], bits[i + 1:]):
+                if (self._negation(literalA, literalB)
+                        or support and self._inconsistent_support(literalA, literalB)):
+                    row |= bitB
+                    self._mutexes[bitB] = self._mutexes.get(bitB, 0) | bitA
+            if row:
+                self._mutexes[bitA] = self._mutexes.get(bitA, 0) | row
 
     def add_inbound_edges(self, action, literals):
         # inbound literal edges are many-to-many
-        for literal in literals:
-            self.parents[literal].add(action)
+        self.parents.link(self.index.mask(literals), self.index.add(action))
 
     def add_outbound_edges(self, action, literals):
         # outbound literal edges are many-to-many
-        for literal in literals:
-            self.children[literal].add(action)
+        self.children.link(self.index.mask(literals), self.index.add(action))
@@ -1,9 +1,10 @@
 
-from itertools import chain, combinations
+from itertools import combinations
 from aimacode.planning import Action
 from aimacode.utils import expr
 
-from layers import BaseActionLayer, BaseLiteralLayer, makeNoOp, make_node
+from _utils import decode_state
+from layers import BaseActionLayer, BaseLiteralLayer, make_action_table
 
 
 class ActionLayer(BaseActionLayer):
@@ -12,59 +13,48 @@ class ActionLayer(BaseActionLayer):
         """ Return True if an effect of one action negates an effect of the other
 
         Hints:
-            (1) `~Literal` can be used to logically negate a literal
-            (2) `self.children` contains a map from actions to effects
+            (1) `self.index.negate()` logically negates a bitset of literals
+            (2) `self.children.mask()` maps actions to the bitset of their effects
 
         See Also
         --------
         layers.ActionNode
+        layers.NodeIndex
         """
-        # TODO: implement this function
-        for effect in self.children[actionA]:
-            if ~effect in self.children[actionB]:
-                return True
-        return False
+        negated_effects = self.index.negate(self.children.mask(actionA))
+        return bool(negated_effects & self.children.mask(actionB))
 
     def _interference(self, actionA, actionB):
         """ Return True if the effects of either action negate the preconditions of the other 
 
         Hints:
-            (1) `~Literal` can be used to logically negate a literal
-            (2) `self.parents` contains a map from actions to preconditions
+            (1) `self.index.negate()` logically negates a bitset of literals
+            (2) `self.parents.mask()` maps actions to the bitset of their preconditions
         
         See Also
         --------
         layers.ActionNode
+        layers.NodeIndex
         """
-        # TODO: implement this function
-        for effect in self.children[actionA]:
-            if ~effect in self.parents[actionB]:
-                return True
-
-        for effect in self.children[actionB]:
-            if ~effect in self.parents[actionA]:
-                return True
-
-        return False
+        negate = self.index.negate
+        return bool(negate(self.children.mask(actionA)) & self.parents.mask(actionB)
+                    or negate(self.children.mask(actionB)) & self.parents.mask(actionA))
 
     def _competing_needs(self, actionA, actionB):
         """ Return True if any preconditions of the two actions are pairwise mutex in the parent layer
 
         Hints:
             (1) `self.parent_layer` contains a reference to the previous literal layer
-            (2) `self.parents` contains a map from actions to preconditions
+            (2) `self.parents.mask()` maps actions to the bitset of their preconditions
         
         See Also
         --------
         layers.ActionNode
         layers.BaseLayer.parent_layer
+        layers.BaseLayer.mutexes_of
         """
-        # TODO: implement this function
-        for preA in self.parents[actionA]:
-            for preB in self.parents[actionB]:
-                if self.parent_layer.is_mutex(preA, preB):
-                    return True
-        return False
+        needs = self.parent_layer.mutexes_of(self.parents.mask(actionA))
+        return bool(needs & self.parents.mask(actionB))
 
 
 class LiteralLayer(BaseLiteralLayer):
@@ -74,18 +64,15 @@ class LiteralLayer(BaseLiteralLayer):
 
         Hints:
             (1) `self.parent_layer` contains a reference to the previous action layer
-            (2) `self.parents` contains a map from literals to actions in the parent layer
+            (2) `self.parents.mask()` maps literals to the bitset of actions in the parent layer
 
         See Also
         --------
         layers.BaseLayer.parent_layer
+        layers.BaseLayer.common_mutexes
         """
-        # TODO: implement this function
-        for actA in self.parents[literalA]:
-            for actB in self.parents[literalB]:
-                if not self.parent_layer.is_mutex(actA, actB):
-                    return False
-        return True
+        mutexes = self.parent_layer.common_mutexes(self.parents.mask(literalA))
+        return not self.parents.mask(literalB) & ~mutexes
 
     def _negation(self, literalA, literalB):
         """ Return True if two literals are negations of each other """
@@ -101,9 +88,10 @@ class PlanningGraph:
         problem : PlanningProblem
             An instance of the PlanningProblem class
 
-        state : tuple(bool)
-            An ordered sequence of True/False values indicating the literal value
-            of the corresponding fluent in problem.state_map
+        state : int
+            An integer bitset with one bit per fluent of problem.state_map, the
+            first fluent being the most significant bit (see _utils.encode_state;
+            an ordered sequence of True/False values is also accepted)
 
         serialize : bool
             Flag indicating whether to serialize non-persistence actions. Actions
@@ -116,14 +104,20 @@ class PlanningGraph:
         self._ignore_mutexes = ignore_mutexes
         self.goal = set(problem.goal)
 
-        # make no-op actions that persist every literal to the next layer
-        no_ops = [make_node(n, no_op=True) for n in chain(*(makeNoOp(s) for s in problem.state_map))]
-        self._actionNodes = no_ops + [make_node(a) for a in problem.actions_list]
+        # the no-op actions that persist every literal to the next layer and the actions of the
+        # problem, compiled to bitsets with their static mutexes once per problem
+        table = getattr(problem, 'action_table', None)
+        if table is None:
+            table = make_action_table(problem.state_map, problem.actions_list, ActionLayer)
+        self._actionNodes = [action for action, _, _, _ in table.actions]
+        self._actionMasks = table.actions
+        self._index = table.index
         
         # initialize the planning graph by finding the literals that are in the
         # first layer and finding the actions they they should be connected to
-        literals = [s if f else ~s for f, s in zip(state, problem.state_map)]
-        layer = LiteralLayer(literals, ActionLayer(), self._ignore_mutexes)
+        fluents = decode_state(state, problem.state_map)
+        literals = list(fluents.pos) + [~s for s in fluents.neg]
+        layer = LiteralLayer(literals, ActionLayer(index=self._index, action_table=table), self._ignore_mutexes)
         layer.update_mutexes()
         self.literal_layers = [layer]
         self.action_layers = []
@@ -305,20 +299,20 @@ class PlanningGraph:
         action_layer = ActionLayer(parent_actions, parent_literals, self._serialize, self._ignore_mutexes)
         literal_layer = LiteralLayer(parent_literals, action_layer, self._ignore_mutexes)
 
-        for action in self._actionNodes:
+        for action, bit, preconditions, effects in self._actionMasks:
             # actions in the parent layer are skipped because are added monotonically to planning graphs,
             # which is performed automatically in the ActionLayer and LiteralLayer constructors
-            if action not in parent_actions and action.preconditions <= parent_literals:
-                action_layer.add(action)
-                literal_layer |= action.effects
+            if not parent_actions.bits & bit and not preconditions & ~parent_literals.bits:
+                action_layer.bits |= bit
+                literal_layer.bits |= effects
 
                 # add two-way edges in the graph connecting the parent layer with the new action
-                parent_literals.add_outbound_edges(action, action.preconditions)
-                action_layer.add_inbound_edges(action, action.preconditions)
+                parent_literals.children.link(preconditions, bit)
+                action_layer.parents.link(bit, preconditions)
 
                 # # add two-way edges in the graph connecting the new literaly layer with the new action
-                action_layer.add_outbound_edges(action, action.effects)
-                literal_layer.add_inbound_edges(action, action.effects)
+                action_layer.children.link(bit, effects)
+                literal_layer.parents.link(effects, bit)
 
         action_layer.update_mutexes()
         literal_layer.update_mutexes()
@@ -1,23 +1,124 @@
 
+from collections import defaultdict
 from functools import lru_cache
+from operator import itemgetter
 
 from aimacode.logic import PropKB
 from aimacode.search import Node, Problem
 
-from _utils import encode_state, decode_state
-from my_planning_graph import PlanningGraph
+from _utils import encode_state, encode_fluents
+from layers import _bits, make_action_table
+from my_planning_graph import ActionLayer, PlanningGraph
 
     ##############################################################################
     #                 YOU DO NOT NEED TO MODIFY CODE IN THIS FILE                #
     ##############################################################################
 
 
+class SuccessorGenerator:
+    """ Index the actions of a problem by their preconditions to find the
+    actions applicable in a state without testing every action.
+
+    Each action is added to the watch list of one of its positive preconditions
+    (the one shared by the fewest actions), so only the watch lists of the
+    fluents that are True in a state are tested, and an action whose watched
+    fluent is False is never looked at. Actions without positive preconditions
+    are tested in every state. The applicable actions are returned in the order
+    they were given, so that search breaks ties as it does without the index.
+
+    Parameters
+    ----------
+    actions : iterable
+        (action, positive precondition mask, negative precondition mask) tuples
+    """
+    def __init__(self, actions):
+        # each action is kept with its position, to restore the order of actions
+        actions = [(i, action, pos, neg) for i, (action, pos, neg) in enumerate(actions)]
+        uses = defaultdict(int)
+        for _, _, pos, _ in actions:
+            for bit in _bits(pos):
+                uses[bit] += 1
+        self._watches = defaultdict(list)
+        self._unwatched = []
+        for entry in actions:
+            pos = entry[2]
+            if pos:
+                watch = min(_bits(pos), key=lambda bit: (uses[bit], bit))
+                self._watches[watch].append(entry)
+            else:
+                self._unwatched.append(entry)
+        self._watches = dict(self._watches)
+        # the fluents watched by some action
+        self._watched = sum(self._watches)
+
+    def applicable(self, state):
+        """ Return the actions whose preconditions hold in state (an integer bitset) """
+        applicable = [(i, action) for i, action, pos, neg in self._unwatched if not state & neg]
+        watches = self._watches
+        fluents = state & self._watched
+        while fluents:
+            bit = fluents & -fluents
+            fluents ^= bit
+            applicable += [(i, action) for i, action, pos, neg in watches[bit]
+                           if state & pos == pos and not state & neg]
+        applicable.sort(key=itemgetter(0))
+        return [action for _, action in applicable]
+
+
 class BasePlanningProblem(Problem):
+    """ States are integer bitsets over state_map (see _utils.encode_state), and
+    the preconditions and effects of every action are compiled into bitsets
+    when actions_list is assigned, so testing whether an action applies is one
+    AND and compare, and applying it two bit operations.
+    The actions are also indexed by a SuccessorGenerator, so that actions()
+    only tests the actions watching a fluent that is True in the state, and
+    compiled into the action_table shared by the planning graphs of the
+    heuristics, which holds the mutexes that do not depend on the state.
+    """
     def __init__(self, initial, goal):
         self.state_map = sorted(initial.pos + initial.neg, key=str)
         self.initial_state_TF = encode_state(initial, self.state_map)
+        self.goal_mask = encode_fluents(goal, self.state_map)
+        self._actions_list = []
+        self._action_masks = {}
+        self._successors = SuccessorGenerator([])
+        self.action_table = None
+        self._literal_bits = []
+        self._goal_literals = set()
         super().__init__(self.initial_state_TF, goal=goal)
 
+    @property
+    def actions_list(self):
+        return self._actions_list
+
+    @actions_list.setter
+    def actions_list(self, actions):
+        """ Store the concrete actions of the problem and compile their bitsets """
+        self._actions_list = actions
+        known = set(self.state_map)
+        # action -> (positive precondition, negative precondition, add, delete) masks
+        self._action_masks = {}
+        # (action, positive mask, negative mask) for the actions that can ever apply;
+        # a precondition on a fluent missing from state_map is never satisfied
+        preconditions = []
+        for action in actions:
+            pos = encode_fluents(action.precond_pos, self.state_map)
+            neg = encode_fluents(action.precond_neg, self.state_map)
+            self._action_masks[action] = (pos, neg,
+                                          encode_fluents(action.effect_add, self.state_map),
+                                          encode_fluents(action.effect_rem, self.state_map))
+            if known.issuperset(action.precond_pos) and known.issuperset(action.precond_neg):
+                preconditions.append((action, pos, neg))
+        self._successors = SuccessorGenerator(preconditions)
+        # the action nodes of the planning graphs and their static mutexes, shared by every graph
+        self.action_table = make_action_table(self.state_map, actions, ActionLayer)
+        index = self.action_table.index
+        # the bit of each fluent in a state, the bits of the fluent and of its negation in
+        # the table, and the bits of the goal literals in the table
+        self._literal_bits = [(encode_fluents([f], self.state_map), index.bits[f], index.bits[~f])
+                              for f in self.state_map]
+        self._goal_literals = set(index.add(g) for g in self.goal)
+
     @lru_cache()
     def h_unmet_goals(self, node):
         """ This heuristic estimates the minimum number of actions that must be
@@ -25,7 +126,19 @@ class BasePlanningProblem(Problem):
         conditions by ignoring the preconditions required for an action to be
         executed.
         """
-        return sum(1 for i, f in enumerate(self.state_map) if not node.state[i] and f in self.goal)
+        return bin(self.goal_mask & ~node.state).count('1')
+
+    def _level_costs(self, state):
+        """ Return the level costs of the goal literals in the planning graph of
+        state (ignoring mutexes), or None if some goal is unreachable
+        """
+        literals = 0
+        for bit, fluent, negation in self._literal_bits:
+            literals |= fluent if state & bit else negation
+        costs = self.action_table.level_costs(literals, self._goal_literals)
+        if len(costs) < len(self._goal_literals):
+            return None
+        return list(costs.values())
 
     @lru_cache()
     def h_pg_levelsum(self, node):
@@ -34,13 +147,17 @@ class BasePlanningProblem(Problem):
         carried out from the current state in order to satisfy each individual
         goal condition.
 
+        The value is the same as PlanningGraph.h_levelsum() with mutexes
+        ignored, but the level costs are computed from the action_table without
+        building the planning graph (see layers.ActionTable.level_costs). It is
+        infinite if some goal can never be reached.
+
         See Also
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
-        score = pg.h_levelsum()
-        return score
+        costs = self._level_costs(node.state)
+        return sum(costs) if costs is not None else float('inf')
 
     @lru_cache()
     def h_pg_maxlevel(self, node):
@@ -49,13 +166,15 @@ class BasePlanningProblem(Problem):
         The level cost is the first level where a goal literal appears in the
         planning graph.
 
+        The value is the same as PlanningGraph.h_maxlevel() with mutexes
+        ignored, computed like h_pg_levelsum() without building the graph.
+
         See Also
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
-        score = pg.h_maxlevel()
-        return score
+        costs = self._level_costs(node.state)
+        return max(costs, default=0) if costs is not None else float('inf')
 
     @lru_cache()
     def h_pg_setlevel(self, node):
@@ -73,31 +192,15 @@ class BasePlanningProblem(Problem):
 
     def actions(self, state):
         """ Return the actions that can be executed in the given state. """
-        possible_actions = []
-        fluent = decode_state(state, self.state_map)
-        for action in self.actions_list:
-            is_possible = True
-            for clause in action.precond_pos:
-                if clause not in fluent.pos:
-                    is_possible = False
-                    break
-            if not is_possible: continue
-            for clause in action.precond_neg:
-                if clause not in fluent.neg:
-                    is_possible = False
-                    break
-            if is_possible: possible_actions.append(action)
-        return possible_actions
+        return self._successors.applicable(state)
 
     def result(self, state, action):
         """ Return the state that results from executing the given action in the
         given state. The action must be one of self.actions(state).
         """
-        return tuple([
-            (f and s not in action.effect_rem) or (s in action.effect_add)
-            for f, s in zip(state, self.state_map)
-        ])
+        _, _, add, rem = self._action_masks[action]
+        return state & ~rem | add
 
-    def goal_test(self, state: str) -> bool:
+    def goal_test(self, state: int) -> bool:
         """ Test the state to see if goal is reached """
-        return all(f for f, c in zip(state, self.state_map) if c in self.goal)
+        return state & self.goal_mask == self.goal_mask
@@ -0,0 +1,119 @@
+import unittest
+
+from itertools import combinations
+
+from aimacode.utils import expr
+from example_have_cake import have_cake
+from air_cargo_problems import air_cargo_p1
+from layers import EdgeMap, NodeIndex, make_node
+from my_planning_graph import ActionLayer, PlanningGraph
+
+
+def set_mutexes(layer):
+    """ Return the mutex pairs of a layer found with the set-based definitions of
+    the mutex rules, given the mutexes of its parent layer
+    """
+    parent = layer.parent_layer
+    pairs = set()
+    for a, b in combinations(layer, 2):
+        if hasattr(a, 'no_op'):
+            mutex = (layer._serialize and not a.no_op and not b.no_op
+                     or any(~e in layer.children[b] for e in layer.children[a])
+                     or any(~e in layer.parents[b] for e in layer.children[a])
+                     or any(~e in layer.parents[a] for e in layer.children[b])
+                     or not layer._ignore_mutexes and any(
+                         parent.is_mutex(p, q) for p in layer.parents[a] for q in layer.parents[b]))
+        else:
+            mutex = (a == ~b
+                     or not layer._ignore_mutexes and len(parent) > 0 and all(
+                         parent.is_mutex(p, q) for p in layer.parents[a] for q in layer.parents[b]))
+        if mutex:
+            pairs.add(frozenset((a, b)))
+    return pairs
+
+
+class TestNodeIndex(unittest.TestCase):
+    def setUp(self):
+        self.literals = [expr('Have(Cake)'), expr('Eaten(Cake)')]
+        self.index = NodeIndex(self.literals)
+
+    def test_bits(self):
+        bits = list(self.index.bits.values())
+        self.assertEqual(sorted(bits), [1 << i for i in range(len(bits))])
+        self.assertEqual(set(self.index.items), set(self.literals) | {~l for l in self.literals})
+        for item, bit in self.index.bits.items():
+            self.assertEqual(self.index.items[bit.bit_length() - 1], item)
+
+    def test_mask_decode(self):
+        for k in range(len(self.literals) + 1):
+            for items in combinations(self.index.items, k):
+                self.assertEqual(set(self.index.decode(self.index.mask(items))), set(items))
+
+    def test_negate(self):
+        for items in combinations(self.index.items, 2):
+            self.assertEqual(set(self.index.decode(self.index.negate(self.index.mask(items)))),
+                             {~item for item in items})
+
+
+class TestEdgeMap(unittest.TestCase):
+    def setUp(self):
+        problem = have_cake()
+        self.actions = [make_node(a) for a in problem.actions_list]
+        self.index = NodeIndex(problem.state_map)
+        self.edges = EdgeMap(self.index)
+        self.expected = {}
+        for action in self.actions:
+            self.edges.add(action, action.effects)
+            self.expected[action] = set(action.effects)
+
+    def test_same_as_dict_of_sets(self):
+        self.assertEqual(dict(self.edges), self.expected)
+        self.assertEqual(len(self.edges), len(self.expected))
+        # indexed, but without edges
+        missing = expr('Have(Cake)')
+        self.assertNotIn(missing, self.edges)
+        self.assertEqual(self.edges[missing], set())
+
+    def test_link(self):
+        action = self.actions[0]
+        literals = list(self.actions[1].preconditions)
+        self.edges.link(self.index.mask([action]), self.index.mask(literals))
+        self.assertEqual(self.edges[action], self.expected[action] | set(literals))
+
+    def test_copy(self):
+        index = NodeIndex(reversed(self.index.items))
+        copy = self.edges.copy(index)
+        self.assertIs(copy.index, index)
+        self.assertEqual(dict(copy), self.expected)
+        self.assertEqual(self.edges.copy(), self.edges)
+
+
+class TestActionTable(unittest.TestCase):
+    def test_mutexes_match_predicates(self):
+        for problem in (have_cake(), air_cargo_p1()):
+            table = problem.action_table
+            nodes = [action for action, _, _, _ in table.actions]
+            layer = ActionLayer(nodes, index=table.index)
+            for action in nodes:
+                layer.add_inbound_edges(action, action.preconditions)
+                layer.add_outbound_edges(action, action.effects)
+            for (a, bitA, _, _), (b, bitB, _, _) in combinations(table.actions, 2):
+                expected = layer._inconsistent_effects(a, b) or layer._interference(a, b)
+                self.assertEqual(bool(table.mutexes.get(bitA, 0) & bitB), expected, (a, b))
+                self.assertEqual(bool(table.mutexes.get(bitB, 0) & bitA), expected, (b, a))
+
+
+class TestLayerMutexes(unittest.TestCase):
+    def test_same_as_set_based_rules(self):
+        for problem in (have_cake(), air_cargo_p1()):
+            for serialize in (True, False):
+                for ignore_mutexes in (True, False):
+                    pg = PlanningGraph(problem, problem.initial, serialize=serialize,
+                                       ignore_mutexes=ignore_mutexes).fill()
+                    for layer in pg.literal_layers + pg.action_layers:
+                        pairs = {frozenset((a, b)) for a, b in combinations(layer, 2) if layer.is_mutex(a, b)}
+                        self.assertEqual(pairs, set_mutexes(layer))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+
+from aimacode.search import Node, breadth_first_search
+from aimacode.utils import expr
+from _utils import decode_state, encode_state, FluentState
+from example_have_cake import have_cake
+from air_cargo_problems import AirCargoProblem, air_cargo_p1, air_cargo_p2
+from my_planning_graph import PlanningGraph
+
+
+def reachable_states(problem, limit=2000):
+    """ Return up to limit states reachable from the initial state of problem """
+    frontier, seen = [problem.initial], {problem.initial}
+    while frontier and len(seen) < limit:
+        state = frontier.pop()
+        for action in problem.actions(state):
+            child = problem.result(state, action)
+            if child not in seen:
+                seen.add(child)
+                frontier.append(child)
+    return seen
+
+
+def applicable(problem, state):
+    """ Test every action against the decoded fluents of state """
+    fluents = decode_state(state, problem.state_map)
+    return [a for a in problem.actions_list
+            if all(c in fluents.pos for c in a.precond_pos) and all(c in fluents.neg for c in a.precond_neg)]
+
+
+class TestBitsetStates(unittest.TestCase):
+    def setUp(self):
+        self.problems = [have_cake(), air_cargo_p1(), air_cargo_p2()]
+
+    def test_encode_decode(self):
+        for problem in self.problems:
+            fluents = decode_state(problem.initial, problem.state_map)
+            self.assertEqual(encode_state(fluents, problem.state_map), problem.initial)
+            self.assertEqual(len(fluents.pos) + len(fluents.neg), len(problem.state_map))
+        fluents = FluentState(['A', 'C'], ['B'])
+        self.assertEqual(encode_state(fluents, ['A', 'B', 'C']), 0b101)
+        self.assertEqual(encode_state(FluentState(['A'], ['B', 'C']), ['A', 'B', 'C']), 0b100)
+        self.assertEqual(decode_state((True, False, True), ['A', 'B', 'C']).pos, ['A', 'C'])
+
+    def test_actions(self):
+        for problem in self.problems:
+            for state in reachable_states(problem):
+                self.assertEqual(problem.actions(state), applicable(problem, state))
+
+    def test_states_order_like_tuples(self):
+        # search breaks ties between nodes by comparing their states
+        for problem in self.problems:
+            states = reachable_states(problem, limit=200)
+            tuples = {state: tuple(f in decode_state(state, problem.state_map).pos for f in problem.state_map)
+                      for state in states}
+            self.assertEqual(sorted(states), sorted(states, key=tuples.get))
+
+    def test_result(self):
+        for problem in self.problems:
+            for state in reachable_states(problem, 200):
+                fluents = decode_state(state, problem.state_map)
+                for action in problem.actions(state):
+                    child = decode_state(problem.result(state, action), problem.state_map)
+                    expected = (set(fluents.pos) - action.effect_rem) | action.effect_add
+                    self.assertEqual(set(child.pos), expected)
+
+    def test_goal_test(self):
+        problem = air_cargo_p1()
+        self.assertFalse(problem.goal_test(problem.initial))
+        self.assertEqual(problem.h_unmet_goals(Node(problem.initial)), 2)
+        node = breadth_first_search(problem)
+        self.assertTrue(problem.goal_test(node.state))
+        self.assertEqual(len(node.solution()), 6)
+        self.assertEqual(problem.h_unmet_goals(node), 0)
+
+
+
+class TestLevelCostHeuristics(unittest.TestCase):
+    def test_same_as_planning_graph(self):
+        for problem in [have_cake(), air_cargo_p1(), air_cargo_p2()]:
+            for state in reachable_states(problem, 100):
+                node = Node(state)
+                pg = PlanningGraph(problem, state, serialize=True, ignore_mutexes=True)
+                self.assertEqual(problem.h_pg_levelsum(node), pg.h_levelsum())
+                pg = PlanningGraph(problem, state, serialize=True, ignore_mutexes=True)
+                self.assertEqual(problem.h_pg_maxlevel(node), pg.h_maxlevel())
+
+    def test_unreachable_goal(self):
+        p1 = air_cargo_p1()
+        problem = AirCargoProblem(p1.cargos, p1.planes, p1.airports, decode_state(p1.initial, p1.state_map),
+                                  p1.goal + [expr('At(C1, ORD)')])
+        node = Node(problem.initial)
+        self.assertEqual(problem.h_pg_levelsum(node), float('inf'))
+        self.assertEqual(problem.h_pg_maxlevel(node), float('inf'))
+
+
+if __name__ == '__main__':
+    unittest.main()
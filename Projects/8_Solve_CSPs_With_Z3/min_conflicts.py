@@ -0,0 +1,178 @@
+"""Min-conflicts local search for very large N-queens problems and map coloring.
+
+Both solvers keep conflict counters in flat lists and update them as
+variables change, so the number of conflicts of any candidate value is read
+in O(1) instead of being recounted over every constraint.
+
+N-queens keeps one queen per row and a permutation of the columns, so rows
+and columns never conflict and only the counters of the two diagonal
+directions are needed. The board is filled greedily (each row takes a random
+free column with empty diagonals when a few tries find one), which leaves
+only a handful of attacked queens; these are then repaired by swapping the
+columns of an attacked queen and a random other queen whenever that lowers
+the number of conflicts (Sosic and Gu). Each candidate swap is evaluated in
+O(1), which solves a million queens in about ten seconds. Small boards have
+local minima, so a board that stops improving is placed again from scratch.
+
+Map coloring counts, for every region and color, the neighbours having that
+color, and repeatedly recolors a random conflicted region with its least
+conflicting color.
+"""
+import random
+
+
+def _place_greedily(n, rand, tries):
+    """Fill the board row by row, preferring columns whose diagonals are still empty """
+    offset = n - 1
+    columns = list(range(n))
+    # number of queens on each diagonal (row + column) and antidiagonal (row - column + n - 1)
+    diagonals = [0] * (2 * n - 1)
+    antidiagonals = [0] * (2 * n - 1)
+    for row in range(n):
+        for _ in range(tries):
+            j = row + int(rand() * (n - row))
+            c = columns[j]
+            if not diagonals[row + c] and not antidiagonals[row - c + offset]:
+                break
+        columns[row], columns[j] = c, columns[row]
+        diagonals[row + c] += 1
+        antidiagonals[row - c + offset] += 1
+    return columns, diagonals, antidiagonals
+
+
+def queens(n, seed=None, max_steps=None, tries=50):
+    """Place n non-attacking queens with min-conflicts repair
+
+    Parameters
+    ----------
+    n : int
+        The number of queens and the size of the board
+
+    seed : int
+        The seed of the random choices
+
+    max_steps : int
+        Give up after this many candidate swaps (defaults to 100 * n + 10000)
+
+    tries : int
+        The number of random columns tried for each row by the greedy
+        initialization before settling for an attacked one
+
+    Returns
+    -------
+    list or None
+        The column of the queen of each row, or None if no solution was
+        found within max_steps (always for n = 2 or 3)
+    """
+    rng = random.Random(seed)
+    randrange, rand = rng.randrange, rng.random
+    offset = n - 1
+    if max_steps is None:
+        max_steps = 100 * n + 10000
+    # restart from a new greedy placement after this many swaps without progress,
+    # since small boards have local minima
+    patience = max(100, n)
+    steps = 0
+
+    while steps < max_steps:
+        columns, diagonals, antidiagonals = _place_greedily(n, rand, tries)
+
+        def attacked(row):
+            c = columns[row]
+            return diagonals[row + c] > 1 or antidiagonals[row - c + offset] > 1
+
+        pending = [row for row in range(n) if attacked(row)]
+        stalled = 0
+        while pending and stalled < patience and steps < max_steps:
+            k = randrange(len(pending))
+            i = pending[k]
+            if not attacked(i):
+                pending[k] = pending[-1]
+                pending.pop()
+                continue
+            steps += 1
+            stalled += 1
+            j = randrange(n)
+            if i == j:
+                continue
+            ci, cj = columns[i], columns[j]
+            # take both queens off the board, then compare their conflicts with the
+            # other queens before and after swapping their columns (whether the two
+            # attack each other does not change with the swap)
+            diagonals[i + ci] -= 1
+            antidiagonals[i - ci + offset] -= 1
+            diagonals[j + cj] -= 1
+            antidiagonals[j - cj + offset] -= 1
+            before = (diagonals[i + ci] + antidiagonals[i - ci + offset]
+                      + diagonals[j + cj] + antidiagonals[j - cj + offset])
+            after = (diagonals[i + cj] + antidiagonals[i - cj + offset]
+                     + diagonals[j + ci] + antidiagonals[j - ci + offset])
+            if after < before:
+                columns[i], columns[j] = ci, cj = cj, ci
+                stalled = 0
+            diagonals[i + ci] += 1
+            antidiagonals[i - ci + offset] += 1
+            diagonals[j + cj] += 1
+            antidiagonals[j - cj + offset] += 1
+            if after < before and attacked(j):
+                pending.append(j)
+        if not pending:
+            return columns
+    return None
+
+
+def color_map(neighbors, colors, seed=None, max_steps=10000):
+    """Color a map so that no two neighbouring regions share a color, with min-conflicts
+
+    Parameters
+    ----------
+    neighbors : dict
+        The regions bordering each region (listing a border once is enough)
+
+    colors : list
+        The available colors
+
+    seed : int
+        The seed of the random choices
+
+    max_steps : int
+        Give up after recoloring this many regions
+
+    Returns
+    -------
+    dict or None
+        The color of every region, or None if no coloring was found within
+        max_steps
+    """
+    regions = list(neighbors)
+    regions += sorted({b for bs in neighbors.values() for b in bs} - set(regions))
+    index = {region: i for i, region in enumerate(regions)}
+    adjacent = [set() for _ in regions]
+    for a, bs in neighbors.items():
+        for b in bs:
+            adjacent[index[a]].add(index[b])
+            adjacent[index[b]].add(index[a])
+    adjacent = [sorted(adj) for adj in adjacent]
+
+    rng = random.Random(seed)
+    k = len(colors)
+    assignment = [rng.randrange(k) for _ in regions]
+    # counts[v][c] is the number of neighbours of region v colored c
+    counts = [[0] * k for _ in regions]
+    for v, adj in enumerate(adjacent):
+        for u in adj:
+            counts[u][assignment[v]] += 1
+
+    for _ in range(max_steps):
+        conflicted = [v for v, c in enumerate(assignment) if counts[v][c]]
+        if not conflicted:
+            return {region: colors[c] for region, c in zip(regions, assignment)}
+        v = rng.choice(conflicted)
+        fewest = min(counts[v])
+        best = rng.choice([c for c in range(k) if counts[v][c] == fewest])
+        old = assignment[v]
+        assignment[v] = best
+        for u in adjacent[v]:
+            counts[u][old] -= 1
+            counts[u][best] += 1
+    return None
@@ -0,0 +1,141 @@
+"""A native backtracking N-queens solver with integer bitmask occupancy.
+
+The columns and both diagonal directions taken by the queens placed so far
+are kept in three Python ints, so the free columns of a row are one
+expression of shifts and masks, and placing or removing a queen is three
+bit flips. Rows are chosen by minimum remaining values (which also detects a
+row left without free columns, like forward checking), and columns are tried
+from the middle of the board outwards.
+
+nqueens(N) has the same shape as the Z3 builder in the notebook, so it plugs
+into the same timing loop:
+
+    nq_solver = nqueens(N)
+    assert nq_solver.check()
+    nq_solver.model()  # {'col0': 3, 'col1': 7, ...}
+"""
+
+
+def _count_bits(mask):
+    return bin(mask).count('1')
+
+
+# int.bit_count() (Python 3.10+) is several times faster than counting the binary string
+count_bits = getattr(int, 'bit_count', _count_bits)
+
+
+def solve(n, stats=None):
+    """Find the first solution of the n-queens problem
+
+    Parameters
+    ----------
+    n : int
+        The number of queens and the size of the board
+
+    stats : dict
+        If given, the number of search 'nodes' and 'backtracks' are stored
+        in it
+
+    Returns
+    -------
+    list or None
+        The column of the queen of each row, or None if there is no solution
+    """
+    full = (1 << n) - 1
+    taken = diagonals = antidiagonals = 0
+    columns = [None] * n
+    unplaced = list(range(n))
+    middle = (n - 1) / 2
+    # one frame per placed row: the row, its former position in unplaced and
+    # its untried columns (the next one last)
+    stack = []
+    nodes = backtracks = 0
+
+    while True:
+        best = None
+        for i, row in enumerate(unplaced):
+            # queen (r, c) takes bit r + c of diagonals and bit c - r + n - 1 of antidiagonals
+            free = full & ~(taken | diagonals >> row | antidiagonals >> (n - 1 - row))
+            count = count_bits(free)
+            if best is None or count < best[0]:
+                best = (count, i, row, free)
+                if count <= 1:
+                    break
+        if best is None:
+            break
+        nodes += 1
+        count, i, row, free = best
+        if count:
+            unplaced[i] = unplaced[-1]
+            unplaced.pop()
+            candidates = []
+            while free:
+                bit = free & -free
+                free ^= bit
+                candidates.append(bit.bit_length() - 1)
+            candidates.sort(key=lambda c: -abs(c - middle))
+            stack.append((row, i, candidates))
+        else:
+            # remove queens until some placed row still has an untried column
+            while stack:
+                row, i, candidates = stack[-1]
+                c = columns[row]
+                taken ^= 1 << c
+                diagonals ^= 1 << (row + c)
+                antidiagonals ^= 1 << (c - row + n - 1)
+                columns[row] = None
+                backtracks += 1
+                if candidates:
+                    break
+                stack.pop()
+                unplaced.append(row)
+                unplaced[i], unplaced[-1] = unplaced[-1], unplaced[i]
+            else:
+                columns = None
+                break
+
+        row, _, candidates = stack[-1]
+        c = candidates.pop()
+        taken |= 1 << c
+        diagonals |= 1 << (row + c)
+        antidiagonals |= 1 << (c - row + n - 1)
+        columns[row] = c
+
+    if stats is not None:
+        stats['nodes'], stats['backtracks'] = nodes, backtracks
+    return columns
+
+
+class QueensSolver:
+    """A native stand-in for the Z3 solver returned by the notebook's nqueens()
+
+    Parameters
+    ----------
+    n : int
+        The number of queens and the size of the board
+
+    Attributes
+    ----------
+    stats : dict
+        The number of search 'nodes' and 'backtracks' of the last check()
+    """
+    def __init__(self, n):
+        self.n = n
+        self.stats = {'nodes': 0, 'backtracks': 0}
+        self._columns = None
+
+    def check(self):
+        """Search for a solution and return whether one exists """
+        self._columns = solve(self.n, self.stats)
+        return self._columns is not None
+
+    def model(self):
+        """Return the solution found by check() as a dict from 'col<i>' to the value of queen i """
+        if self._columns is None:
+            raise ValueError('No model available: check() did not find a solution')
+        return {'col{}'.format(i): c for i, c in enumerate(self._columns)}
+
+
+def nqueens(N):
+    """Return a solver for the N-queens problem (call check(), then model()) """
+    return QueensSolver(N)
@@ -0,0 +1,36 @@
+import unittest
+
+import min_conflicts
+
+
+class TestMinConflicts(unittest.TestCase):
+    australia = {'WA': ['NT', 'SA'], 'NT': ['SA', 'Q'], 'SA': ['Q', 'NSW', 'V'], 'Q': ['NSW'],
+                 'NSW': ['V'], 'T': []}
+
+    def assertQueens(self, columns, n):
+        self.assertEqual(sorted(columns), list(range(n)))
+        self.assertEqual(len({row + c for row, c in enumerate(columns)}), n)
+        self.assertEqual(len({row - c for row, c in enumerate(columns)}), n)
+
+    def test_queens(self):
+        for n in (1, 4, 5, 8, 20, 100, 1000):
+            self.assertQueens(min_conflicts.queens(n, seed=n), n)
+
+    def test_queens_without_solution(self):
+        for n in (2, 3):
+            self.assertIsNone(min_conflicts.queens(n, seed=0, max_steps=1000))
+
+    def test_color_map(self):
+        coloring = min_conflicts.color_map(self.australia, ['red', 'green', 'blue'], seed=0)
+        # V is only listed as a neighbour
+        self.assertEqual(set(coloring), set(self.australia) | {'V'})
+        for a, bs in self.australia.items():
+            for b in bs:
+                self.assertNotEqual(coloring[a], coloring[b], (a, b))
+
+    def test_color_map_without_solution(self):
+        self.assertIsNone(min_conflicts.color_map(self.australia, ['red', 'green'], seed=0, max_steps=1000))
+
+
+if __name__ == '__main__':
+    unittest.main()
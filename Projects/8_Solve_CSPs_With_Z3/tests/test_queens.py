@@ -0,0 +1,35 @@
+import unittest
+
+import queens
+
+
+class TestQueens(unittest.TestCase):
+    def assertQueens(self, columns, n):
+        self.assertEqual(sorted(columns), list(range(n)))
+        self.assertEqual(len({row + c for row, c in enumerate(columns)}), n)
+        self.assertEqual(len({row - c for row, c in enumerate(columns)}), n)
+
+    def test_nqueens(self):
+        for n in (1, 4, 5, 8, 13, 50, 200):
+            solver = queens.nqueens(n)
+            self.assertTrue(solver.check())
+            model = solver.model()
+            self.assertEqual(set(model), {'col{}'.format(i) for i in range(n)})
+            self.assertQueens([model['col{}'.format(i)] for i in range(n)], n)
+            self.assertGreaterEqual(solver.stats['nodes'], n)
+
+    def test_no_solution(self):
+        for n in (2, 3):
+            self.assertIsNone(queens.solve(n))
+            solver = queens.nqueens(n)
+            self.assertFalse(solver.check())
+            with self.assertRaises(ValueError):
+                solver.model()
+
+    def test_model_before_check(self):
+        with self.assertRaises(ValueError):
+            queens.nqueens(8).model()
+
+
+if __name__ == '__main__':
+    unittest.main()
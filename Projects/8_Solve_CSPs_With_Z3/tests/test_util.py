@@ -0,0 +1,48 @@
+import unittest
+from itertools import product
+
+from sympy import Abs, And, Eq, Ne, Not, Or, false, symbols
+
+from util import compile_constraint, constraint
+
+
+class TestCompileConstraint(unittest.TestCase):
+    variables = symbols('A B C')
+
+    def constraints(self):
+        A, B, C = self.variables
+        return [constraint('NotEqual', Ne(A, B)),
+                constraint('Equal', Eq(A, C)),
+                constraint('FarApart', Abs(A - B) > 1),
+                constraint('Both', And(Ne(A, B), Ne(B, C))),
+                constraint('Either', Or(Eq(A, 1), Eq(B, 2))),
+                constraint('Differ', Not(Eq(A, C))),
+                constraint('Sum', A + B <= C),
+                constraint('Less', A < B)]
+
+    def subs(self, c, assignment):
+        return c.subs({var: value for var, value in zip(self.variables, assignment) if value is not None})
+
+    def test_complete_assignments(self):
+        for c in self.constraints():
+            compiled = compile_constraint(c, self.variables)
+            for assignment in product(range(3), repeat=3):
+                expected = bool(self.subs(c, assignment))
+                self.assertEqual(compiled.is_satisfied(assignment), expected, (compiled.name, assignment))
+                self.assertEqual(compiled.is_consistent(assignment), expected, (compiled.name, assignment))
+
+    def test_partial_assignments(self):
+        for c in self.constraints():
+            compiled = compile_constraint(c, self.variables)
+            for assignment in product([None, 0, 1, 2], repeat=3):
+                expected = self.subs(c, assignment) is not false
+                self.assertEqual(compiled.is_consistent(assignment), expected, (compiled.name, assignment))
+
+    def test_scope(self):
+        A, B, C = self.variables
+        compiled = compile_constraint(constraint('NotEqual', Ne(C, A)), self.variables)
+        self.assertEqual((compiled.name, sorted(compiled.scope)), ('NotEqual', [0, 2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -36,6 +36,119 @@ def constraint(name, expr):
     return func
 
 
+class CompiledConstraint:
+    """A constraint compiled into plain Python predicates over variable indices
+
+    Assignments are sequences indexed like the variables passed to
+    compile_constraint(), holding None for unassigned variables, so checking
+    a constraint never builds or simplifies a sympy expression.
+
+    Attributes
+    ----------
+    name : str
+        The name of the constraint function (or of the expression)
+
+    scope : tuple
+        The indices of the variables the constraint depends on
+    """
+    def __init__(self, name, scope, satisfied, evaluate):
+        self.name = name
+        self.scope = scope
+        self._satisfied = satisfied
+        self._evaluate = evaluate
+
+    def is_satisfied(self, assignment):
+        """Return whether a complete assignment satisfies the constraint """
+        return bool(self._satisfied(assignment))
+
+    def is_consistent(self, partial):
+        """Return whether a partial assignment can still satisfy the constraint
+
+        This is False exactly when substituting the assigned values with
+        .subs() evaluates the constraint to False: once every variable of the
+        scope is assigned, or when the assigned variables alone decide an
+        And, Or or Not of the constraint. (A relation that sympy can only
+        decide by cancelling terms, like Eq(A - B, A) with B assigned, stays
+        undetermined until all its variables are assigned.)
+        """
+        return self._evaluate(partial) is not False
+
+
+def _compile_node(expr, index):
+    """Compile expr into a function of an assignment returning True, False or None (undetermined) """
+    if expr is true or expr is false:
+        value = bool(expr)
+        return lambda assignment: value
+    if isinstance(expr, (And, Or, Not)):
+        parts = [_compile_node(arg, index) for arg in expr.args]
+        if isinstance(expr, Not):
+            part = parts[0]
+
+            def evaluate(assignment):
+                value = part(assignment)
+                return None if value is None else not value
+        else:
+            # the value that decides the connective on its own (False for And)
+            decisive = isinstance(expr, Or)
+
+            def evaluate(assignment):
+                undetermined = False
+                for part in parts:
+                    value = part(assignment)
+                    if value is decisive:
+                        return decisive
+                    if value is None:
+                        undetermined = True
+                return None if undetermined else not decisive
+        return evaluate
+
+    symbols = sorted(expr.free_symbols, key=str)
+    func = lambdify(symbols, expr, "math")
+    positions = [index[s] for s in symbols]
+
+    def evaluate(assignment):
+        values = [assignment[i] for i in positions]
+        if None in values:
+            return None
+        return bool(func(*values))
+    return evaluate
+
+
+def compile_constraint(c, variables):
+    """Compile a constraint built by constraint() into fast predicates
+
+    Parameters
+    ----------
+    c : sympy.Function or sympy.Expr
+        A constraint returned by constraint() (or any sympy boolean
+        expression)
+
+    variables : list
+        The sympy symbols of the problem; assignments passed to the compiled
+        constraint are sequences of values in the same order
+
+    Returns
+    -------
+    CompiledConstraint
+        An object whose is_satisfied(assignment) and is_consistent(partial)
+        methods give the same answers as evaluating c.subs() with the
+        assigned values
+    """
+    expr = getattr(c, "expr", c)
+    index = {var: i for i, var in enumerate(variables)}
+    symbols = sorted(expr.free_symbols, key=str)
+    name = c.func.__name__ if hasattr(c, "expr") else str(expr)
+    if not symbols:
+        value = bool(expr)
+        return CompiledConstraint(name, (), lambda assignment: value, lambda assignment: value)
+    func = lambdify(symbols, expr, "math")
+    positions = tuple(index[s] for s in symbols)
+
+    def satisfied(assignment):
+        return func(*[assignment[i] for i in positions])
+    return CompiledConstraint(name, positions, satisfied, _compile_node(expr, index))
+
+
 def displayBoard(locations, shape):
     """Draw a chessboard with queens placed at each position specified
     by the assignment.